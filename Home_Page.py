@@ -1,25 +1,118 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from st_aggrid import AgGrid
+import numpy as np
+
+from dashboard import prerender, tracing
+from dashboard.cache import load_aggregate_cache
+from dashboard.data import load_dataset
+from dashboard.downsample import downsample
+from dashboard.genres import load_genre_index
+from dashboard.grid import PAGE_SIZES, grid_options, page_count, page_rows, search_rows
+from dashboard.index import load_filter_index
+from dashboard.query import Query, filters_from, load_query_backend
+from dashboard.scheduler import TaskGraph, settle
+from dashboard.startup import lazy_import
+
+# plotting and grid modules are only imported once the first chart or grid is built
+px = lazy_import("plotly.express")
+st_aggrid = lazy_import("st_aggrid")
 
 
 #  wide mode
 st.set_page_config(page_title="Gruppe 5 Datenvisualisierung", layout="wide")
+trace = tracing.begin("Home_Page")
 
 #  "logo"
 
 st.sidebar.image("assets/logo_asmodeus.jpg", use_container_width=True)
 
 
-# Load Data
-@st.cache_data
-def load_data():
-    df = pd.read_csv("google_clean_v3.csv")
-    df["Last_Updated"] = pd.to_datetime(df["Last_Updated"], errors="coerce", format="%Y-%m-%d")
-    return df
+# Load Data (shared across pages and sessions)
+with trace.span("load_data"):
+    # one dataset version per rerun, the frame and its indexes always match
+    dataset = load_dataset()
+    df = dataset.df
+    filter_index = load_filter_index(dataset)
+    genre_index = load_genre_index(dataset)
+    aggregate_cache = load_aggregate_cache()
+    query_backend = load_query_backend(dataset)
+
+
+def per_category(filters, func, measure):
+    """``func`` of ``measure`` per category, largest first."""
+    result = query_backend.execute(Query(filters, group_by=("Category",), measures=((measure, func, measure),),
+                                         order_by=((measure, False),)))
+    return result.set_index("Category")[measure]
+
+
+def compute_aggregates(df_filtered, filters):
+    """Aggregates behind the landing and quick analysis charts."""
+    rating_counts, rating_edges = np.histogram(df_filtered["Rating"], bins=20)
+    return {
+        "avg_ratings": per_category(filters, "mean", "Rating"),
+        "installs_per_category": per_category(filters, "sum", "Installs"),
+        "top_reviewed": query_backend.execute(Query(filters, columns=("App", "Reviews", "Installs"),
+                                                    order_by=(("Reviews", False),), limit=10)),
+        "rating_hist": pd.DataFrame({"Rating": (rating_edges[:-1] + rating_edges[1:]) / 2, "count": rating_counts}),
+        "genre_stats": genre_index.aggregate(df_filtered),
+    }
+
+
+# Chart builders, they run on the task pool and only return the figures
+
+
+def category_ratings_figure(aggregates):
+    avg_ratings = aggregates["avg_ratings"]
+    fig = px.bar(avg_ratings, x=avg_ratings.index, y=avg_ratings.values,
+                 title="Durchschnittliche Bewertungen pro Kategorie",
+                 color=avg_ratings.values,
+                 color_continuous_scale="Viridis"
+    )
+    fig.update_layout(
+        yaxis_title="Durchschnittliche Bewertung"
+    )
+    return fig
+
+
+def installs_figure(aggregates):
+    installs_per_category = aggregates["installs_per_category"]
+    fig = px.bar(installs_per_category, x=installs_per_category.index, y=installs_per_category.values,
+                 title="Gesamtinstallationen pro Kategorie",
+                 color=aggregates["avg_ratings"].values,
+                 color_continuous_scale="Viridis"
+    )
+    fig.update_layout(
+        yaxis_title="Gesamtinstallationen"
+    )
+    return fig
+
+
+def genres_figure(aggregates):
+    # apps with several genres count once for each of them
+    genre_stats = aggregates["genre_stats"].nlargest(20, "count")
+    return px.bar(genre_stats, x=genre_stats.index, y="count", title="Die 20 häufigsten Genres",
+                  color="Rating_mean", color_continuous_scale="Viridis",
+                  labels={"count": "Anzahl der Apps", "Rating_mean": "Ø Bewertung"})
+
 
-df = load_data()
+def rating_histogram_figure(aggregates):
+    # Histogram of Ratings Distribution from the precomputed bins
+    fig = px.bar(aggregates["rating_hist"], x="Rating", y="count", title="Verteilung der App-Bewertungen",
+                 color_discrete_sequence=["#5ec962"])
+    fig.update_layout(bargap=0)
+    return fig
+
+
+def top_reviewed_figure(aggregates):
+    return px.bar(aggregates["top_reviewed"], x="App", y="Reviews", title="Top 10 der am meisten bewerteten Apps",
+                  color="Installs", color_continuous_scale="Viridis")
+
+
+def rating_vs_reviews_figure(df_filtered):
+    """Scatter figure and the number of points in it (sampled above the point budget, extremes are kept)."""
+    scatter_data = downsample(df_filtered, stratify="Type", extremes=["Reviews", "Rating"])
+    fig = px.scatter(scatter_data, x="Reviews", y="Rating", title="Bewertungen vs. Rezensionen", color="Type", color_discrete_map={"Free": "#5ec962", "Paid": "#fde725"})
+    return fig, len(scatter_data)
 
 # --- DATASET SUMMARY ---
 
@@ -60,65 +153,119 @@ selected_type = st.sidebar.selectbox("Typ auswählen", ["Alle"] + df["Type"].uni
 selected_category = st.sidebar.selectbox("Kategorie auswählen", ["Alle"] + df["Category"].unique().tolist())
 selected_rating = st.sidebar.slider("Bewertungsbereich auswählen", min_value=0.0, max_value=5.0, value=(0.0, 5.0))
 selected_reviews = st.sidebar.slider("Bewertungen Bereich auswählen", min_value=0, max_value=int(df["Reviews"].max()), value=(0, int(df["Reviews"].max())))
-
-# Apply filters based on user input
-
-df_filtered = df[
-    ((df["Type"] == selected_type) | (selected_type == "Alle")) &
-    ((df["Category"] == selected_category) | (selected_category == "Alle")) &
-    (df["Rating"] >= selected_rating[0]) &
-    (df["Rating"] <= selected_rating[1]) &
-    (df["Reviews"] >= selected_reviews[0]) &
-    (df["Reviews"] <= selected_reviews[1])
-]
+# a newer drag position stops this rerun at the next widget, before any filtering
+settle("home_ranges", (selected_rating, selected_reviews))
+selected_genres = st.sidebar.multiselect("Genres auswählen", genre_index.genres)
+genre_mode = "all" if st.sidebar.radio("Genres kombinieren", ["Mindestens eines", "Alle"], horizontal=True) == "Alle" else "any"
+
+# Apply filters based on user input ("Alle" means no filter on that column)
+selected_values = {"Type": selected_type, "Category": selected_category}
+equals = {col: value for col, value in selected_values.items() if value != "Alle"}
+ranges = {"Rating": selected_rating, "Reviews": selected_reviews}
+with trace.span("filter"):
+    row_ids = filter_index.select(equals, ranges)
+    if selected_genres:
+        row_ids = np.intersect1d(row_ids, genre_index.rows(selected_genres, genre_mode), assume_unique=True)
+    df_filtered = df.take(row_ids)
+
+# e.g. "Alle" genres that no app combines, the charts cannot be built from no rows
+if df_filtered.empty:
+    st.warning("Keine Apps für die ausgewählten Filter gefunden.")
+    st.stop()
+
+# chart aggregates are shared between reruns and sessions with the same filter state,
+# a data refresh only invalidates them if it touched the selected category
+genre_signature = (tuple(sorted(selected_genres)), genre_mode if len(selected_genres) > 1 else None)
+filters = filters_from(equals, ranges)
+if selected_genres:
+    filters += (("Genres", f"has_{genre_mode}", genre_signature[0]),)
+aggregates_key = ("home", dataset.version_of(equals.get("Category")),
+                  filter_index.signature(equals, ranges), genre_signature)
+
+# the charts are built in the background while the grid below renders,
+# unless this state was pre-rendered (python -m dashboard.prerender)
+state = (selected_type, selected_category, selected_rating, selected_reviews) + genre_signature
+tasks = TaskGraph("Home_Page", trace, prerendered=prerender.lookup("Home_Page", state, dataset))
+tasks.add("aggregates", lambda: aggregate_cache.get_or_compute(aggregates_key, lambda: compute_aggregates(df_filtered, filters)))
+tasks.add("px: ratings per category", category_ratings_figure, after=["aggregates"])
+if "Installs" in df.columns:
+    tasks.add("px: installs per category", installs_figure, after=["aggregates"])
+tasks.add("px: genres", genres_figure, after=["aggregates"])
+tasks.add("px: rating histogram", rating_histogram_figure, after=["aggregates"])
+tasks.add("px: top reviewed", top_reviewed_figure, after=["aggregates"])
+tasks.add("px: rating vs reviews", rating_vs_reviews_figure, df_filtered)
 
 #  --- data discovery ---
 
 st.subheader("Dataset-Exploration")
-# Display the filtered dataframe using AgGrid
-AgGrid(df_filtered)
+
+
+# Search, sorting and paging only depend on the filtered rows, changing them reruns just this fragment
+@st.fragment
+def data_grid(df_filtered):
+    grid_trace = tracing.begin("Home_Page/data_grid")
+
+    # the grid only receives the visible page
+    col_search, col_sort, col_order, col_page_size, col_page = st.columns([3, 2, 1, 1, 1])
+    search = col_search.text_input("App suchen")
+    sort_by = col_sort.selectbox("Sortieren nach", ["(keine)"] + df_filtered.columns.tolist())
+    ascending = col_order.radio("Reihenfolge", ["Aufsteigend", "Absteigend"]) == "Aufsteigend"
+    page_size = col_page_size.selectbox("Zeilen pro Seite", PAGE_SIZES)
+
+    with grid_trace.span("grid: search"):
+        df_grid = search_rows(df_filtered, search)
+    n_pages = page_count(len(df_grid), page_size)
+    page = col_page.number_input(f"Seite (von {n_pages})", min_value=1, max_value=n_pages, value=1)
+
+    # Display the current page of the filtered dataframe using AgGrid
+    with grid_trace.span("grid: page"):
+        grid_rows = page_rows(df_grid, page, page_size, None if sort_by == "(keine)" else sort_by, ascending)
+    with grid_trace.span("render: AgGrid", payload=grid_rows):
+        st_aggrid.AgGrid(grid_rows, gridOptions=grid_options(grid_rows.columns), show_search=False,
+                         update_on=[])
+    st.caption(f"{len(df_grid):,} Apps gefunden")
+    grid_trace.finish(label="⏱ Fragment-Profil")
+
+
+data_grid(df_filtered)
 
 #  ------landing main charts-----
 
 col_main_chart1, col_main_chart2 = st.columns(2)
+aggregates = tasks.result("aggregates")
 
 #  Main Chart 1
 with col_main_chart1:
     #  bar chart
-    avg_ratings = df_filtered.groupby("Category")["Rating"].mean().sort_values(ascending=False)
-    fig_category_ratings = px.bar(avg_ratings, x=avg_ratings.index, y=avg_ratings.values,
-                                  title="Durchschnittliche Bewertungen pro Kategorie",
-                                  color=avg_ratings.values,
-                                  color_continuous_scale="Viridis"
-    )
-    fig_category_ratings.update_layout(
-        yaxis_title="Durchschnittliche Bewertung"
-    )
-    st.plotly_chart(fig_category_ratings, use_container_width=True)
+    avg_ratings = aggregates["avg_ratings"]
+    fig_category_ratings = tasks.result("px: ratings per category")
+    with trace.span("render: ratings per category", payload=fig_category_ratings):
+        st.plotly_chart(fig_category_ratings, use_container_width=True)
 
     #  Show DataFrame preview for this plot
     st.subheader("Datenvorschau für durchschnittliche Bewertungen pro Kategorie")
-    st.write(df_filtered.groupby("Category")["Rating"].mean().head())  # Display top 5 rows of the grouped data
+    st.write(avg_ratings.sort_index().head())  # Display top 5 rows of the grouped data
 
 # Main Chart 2
 with col_main_chart2:
     # Installs x category bar chart
     if "Installs" in df.columns:
-        installs_per_category = df_filtered.groupby("Category")["Installs"].sum().sort_values(ascending=False)
-        fig_installs = px.bar(installs_per_category, x=installs_per_category.index, y=installs_per_category.values,
-                              title="Gesamtinstallationen pro Kategorie",
-                              color=avg_ratings.values,
-                              color_continuous_scale="Viridis"
-        )
-        fig_installs.update_layout(
-            yaxis_title="Gesamtinstallationen"
-        )
-        st.plotly_chart(fig_installs, use_container_width=True)
+        installs_per_category = aggregates["installs_per_category"]
+        fig_installs = tasks.result("px: installs per category")
+        with trace.span("render: installs per category", payload=fig_installs):
+            st.plotly_chart(fig_installs, use_container_width=True)
 
         #  df preview
         st.subheader("Datenvorschau für Installationen pro Kategorie")
         st.write(installs_per_category.head())
 
+# --- genres ---
+st.subheader("Genres")
+
+fig_genres = tasks.result("px: genres")
+with trace.span("render: genres", payload=fig_genres):
+    st.plotly_chart(fig_genres, use_container_width=True)
+
 # --- secondary charts ---
 st.subheader("Schnellanalyse")
 
@@ -127,10 +274,9 @@ col_chart1, col_chart2, col_chart3 = st.columns(3)
 
 #  Chart 1: Distribution of Ratings
 with col_chart1:
-    # Create a histogram of Ratings Distribution
-    fig_hist = px.histogram(df_filtered, x="Rating", nbins=20, title="Verteilung der App-Bewertungen",
-                            color_discrete_sequence=["#5ec962"])
-    st.plotly_chart(fig_hist, use_container_width=True)
+    fig_hist = tasks.result("px: rating histogram")
+    with trace.span("render: rating histogram", payload=fig_hist):
+        st.plotly_chart(fig_hist, use_container_width=True)
 
     #  df
     st.subheader("Datenvorschau für Verteilung der Bewertungen")
@@ -139,10 +285,10 @@ with col_chart1:
 # Chart 3: Top 10 Most Reviewed Apps
 with col_chart2:
     # top 10 reviews preview
-    top_reviewed = df_filtered.nlargest(10, "Reviews")
-    fig_top_reviews = px.bar(top_reviewed, x="App", y="Reviews", title="Top 10 der am meisten bewerteten Apps",
-                             color="Installs", color_continuous_scale="Viridis")
-    st.plotly_chart(fig_top_reviews, use_container_width=True)
+    top_reviewed = aggregates["top_reviewed"]
+    fig_top_reviews = tasks.result("px: top reviewed")
+    with trace.span("render: top reviewed", payload=fig_top_reviews):
+        st.plotly_chart(fig_top_reviews, use_container_width=True)
 
     # df
     st.subheader("Datenvorschau für Top 10 der am meisten bewerteten Apps")
@@ -151,8 +297,11 @@ with col_chart2:
 # Chart 3: rating vs reviews
 with col_chart3:
     #  Rating vs Reviews scatter
-    fig_rating_vs_reviews = px.scatter(df_filtered, x="Reviews", y="Rating", title="Bewertungen vs. Rezensionen", color="Type", color_discrete_map={"Free": "#5ec962", "Paid": "#fde725"})
-    st.plotly_chart(fig_rating_vs_reviews, use_container_width=True)
+    fig_rating_vs_reviews, n_points = tasks.result("px: rating vs reviews")
+    with trace.span("render: rating vs reviews", payload=fig_rating_vs_reviews):
+        st.plotly_chart(fig_rating_vs_reviews, use_container_width=True)
+    if n_points < len(df_filtered):
+        st.caption(f"Stichprobe: {n_points:,} von {len(df_filtered):,} Apps (inkl. Extremwerte)")
 
     #  df
     st.subheader("Datenvorschau für Bewertungen vs. Rezensionen")
@@ -168,3 +317,6 @@ with st.expander("Wie man dieses Dashboard verwendet"):
     - **Analysen:** Navigieren Sie zu verschiedenen Seiten über die Seitenleiste oder Schaltflächen.
     - **Interaktivität:** Verwenden Sie Filter und Animationen, um mit Diagrammen zu interagieren.
     """)
+
+prerender.record("Home_Page", state, tasks)
+trace.finish()
@@ -0,0 +1,36 @@
+"""Helpers for client-side Plotly animations.
+
+All frames are computed in one pass and shipped with the figure, the
+browser plays them back so the server never loops or sleeps.
+"""
+import numpy as np
+
+N_FRAMES = 100
+
+
+def growth_steps(values, n_frames=N_FRAMES):
+    """``values`` scaled from 1/n_frames up to 1, one row per frame, as ints."""
+    factors = np.arange(1, n_frames + 1) / n_frames
+    return (np.outer(factors, np.asarray(values, dtype="float64"))).astype("int64"), factors
+
+
+def frame_duration(speed):
+    """Milliseconds per frame for the 0.01 - 1.0 speed slider (1.0 is 30 fps)."""
+    return 1000 / (speed * 30)
+
+
+def play_controls(duration, redraw=False, label="▶️ Play"):
+    """Play/pause buttons for ``layout.updatemenus``."""
+    play = dict(frame=dict(duration=duration, redraw=redraw), transition=dict(duration=0), fromcurrent=False,
+                mode="immediate")
+    pause = dict(frame=dict(duration=0, redraw=redraw), transition=dict(duration=0), mode="immediate")
+    return [dict(
+        type="buttons",
+        direction="left",
+        x=0.5, xanchor="center", y=1.15, yanchor="bottom",
+        showactive=False,
+        buttons=[
+            dict(label=label, method="animate", args=[None, play]),
+            dict(label="⏸", method="animate", args=[[None], pause]),
+        ],
+    )]
@@ -0,0 +1,338 @@
+"""Headless HTTP API over the numbers the dashboard shows.
+
+    DASHBOARD_API=1 python -m dashboard.startup      next to the dashboard, in its process
+    python -m dashboard.api [--host 127.0.0.1] [--port 8502]    on its own
+
+    GET /categories?Type=Paid               average rating, installs and app count per category
+    GET /top?metric=Installs&category=GAME&n=20
+    GET /price-categories?Category=GAME     app count per price category
+    GET /android-versions?year=2015,2018    average installs per year and Android version
+    GET /rows?Rating=4,5&search=photo&sort_by=Reviews&ascending=0&page=1&page_size=100
+    POST /batch  {"queries": [{"endpoint": "top", "params": {"n": 5}}, ...]}
+
+Filters work like the page sidebars: ``Category``/``Type``/... select one
+value, ``Rating``/``Reviews``/``Installs``/``Price`` take an inclusive
+``low,high`` range (either side may be empty), ``genres=Action;Puzzle`` with
+``genre_mode=any|all`` matches the Genres column. ``columns=App,Reviews``
+restricts the returned columns.
+
+``format=json`` (default) returns one JSON array of records, ``ndjson`` and
+``arrow`` (Arrow IPC stream) are sent in chunks of API_CHUNK_ROWS rows, use
+them for bulk reads like ``/rows`` without ``page``. A batch runs all its
+queries on the same dataset version and answers with one JSON document.
+
+The service uses the same loaders as the pages (dataset versions with the
+delta files applied, query backend, cube, top-K index) and keeps aggregations
+in the process wide aggregate cache, keyed by dataset version. Started by
+dashboard.startup it runs on a thread of the dashboard process and shares
+everything the pages loaded and cached. On its own it is a second process
+with its own copy of the dataset and caches, unless DASHBOARD_SHARED_PATH
+maps the same snapshot. No figures are built.
+"""
+import argparse
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from dashboard.cache import load_aggregate_cache
+from dashboard.cube import load_android_version_cube, load_data_cube
+from dashboard.data import load_dataset
+from dashboard.grid import page_rows, search_rows
+from dashboard.query import SEPARATOR, PandasBackend, Query, load_query_backend
+from dashboard.settings import API_CHUNK_ROWS, API_HOST, API_PORT
+from dashboard.topk import RANKED_METRICS, load_top_k_index
+
+EQUALS_COLUMNS = ["Category", "Type", "Price Category", "Rating Group", "Content Rating", "Android Ver"]
+RANGE_COLUMNS = ["Rating", "Reviews", "Installs", "Price"]
+FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson",
+           "arrow": "application/vnd.apache.arrow.stream"}
+MAX_PAGE_SIZE = 10_000
+
+
+class QueryError(ValueError):
+    """Invalid endpoint or parameter, answered with 400."""
+
+
+def _number(text, name):
+    try:
+        return float(text)
+    except ValueError:
+        raise QueryError(f"{name}: {text!r} ist keine Zahl") from None
+
+
+def _integer(params, name, default, low=1, high=None):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise QueryError(f"{name}: {value!r} ist keine ganze Zahl") from None
+    if value < low or (high is not None and value > high):
+        raise QueryError(f"{name} muss zwischen {low} und {high or '∞'} liegen")
+    return value
+
+
+def _flag(params, name):
+    return params.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _range_filters(column, text):
+    low, sep, high = text.partition(",")
+    if not sep:
+        raise QueryError(f"{column}: Bereich als 'von,bis' angeben")
+    filters = ()
+    if low.strip():
+        filters += ((column, ">=", _number(low, column)),)
+    if high.strip():
+        filters += ((column, "<=", _number(high, column)),)
+    return filters
+
+
+def query_filters(params):
+    """Query filters of the sidebar style parameters."""
+    filters = ()
+    for column in EQUALS_COLUMNS:
+        if column in params:
+            filters += ((column, "==", params[column]),)
+    for column in RANGE_COLUMNS:
+        if column in params:
+            filters += _range_filters(column, params[column])
+    if params.get("genres"):
+        mode = params.get("genre_mode", "any")
+        if mode not in ("any", "all"):
+            raise QueryError("genre_mode muss 'any' oder 'all' sein")
+        filters += (("Genres", f"has_{mode}", tuple(sorted(params["genres"].split(SEPARATOR)))),)
+    return filters
+
+
+def _columns(df, params):
+    """``df`` restricted to the ``columns`` parameter."""
+    if not params.get("columns"):
+        return df
+    columns = params["columns"].split(",")
+    unknown = [column for column in columns if column not in df.columns]
+    if unknown:
+        raise QueryError(f"Unbekannte Spalten: {', '.join(unknown)}")
+    return df[columns]
+
+
+# Endpoints, each returns a DataFrame for a dataset version and the request parameters
+
+
+def category_stats(data, params):
+    """Average rating, total installs and app count per category (the Home_Page bar charts)."""
+    return load_query_backend(data).execute(Query(
+        query_filters(params), group_by=("Category",),
+        measures=(("avg_rating", "mean", "Rating"), ("total_installs", "sum", "Installs"), ("apps", "count", None)),
+        order_by=(("total_installs", False),)))
+
+
+def top_apps(data, params):
+    """Top ``n`` apps by ``metric``, over all categories or in ``category``."""
+    metric = params.get("metric", "Reviews")
+    if metric not in RANKED_METRICS:
+        raise QueryError(f"metric muss eine von {', '.join(RANKED_METRICS)} sein")
+    top = load_top_k_index(data).top(metric, params.get("category"), _integer(params, "n", 10, high=MAX_PAGE_SIZE))
+    return _columns(top.reset_index(drop=True), params)
+
+
+def price_category_counts(data, params):
+    """App count per price category, from the cube (equality filters and remove_extremes only)."""
+    cube = load_data_cube(remove_extremes=_flag(params, "remove_extremes"), data=data)
+    filters = {column: params[column] for column in EQUALS_COLUMNS if column in params}
+    unsupported = [name for name in RANGE_COLUMNS + ["genres"] if name in params]
+    unsupported += [column for column in filters if column not in cube.dimensions]
+    if unsupported:
+        raise QueryError(f"price-categories unterstützt keine Filter auf {', '.join(unsupported)}")
+    counts = cube.rollup(["Price Category"], filters)["count"]
+    return counts.rename("apps").reset_index()
+
+
+def android_version_installs(data, params):
+    """Average installs per year and Android version (the Android version page)."""
+    filters = ()
+    if "year" in params:
+        year = params["year"]
+        filters += _range_filters("year_last_update", year if "," in year else f"{year},{year}")
+    if "Android Ver" in params:
+        filters += (("Android Ver", "==", params["Android Ver"]),)
+    # the cube cells are a small frame, the pandas backend filters and orders them like the dataset
+    cells = PandasBackend(load_android_version_cube(data).cells).execute(
+        Query(filters, order_by=(("year_last_update", True), ("Android Ver", True))))
+    return (cells.assign(avg_installs=cells["Installs_sum"] / cells["count"])
+            [["year_last_update", "Android Ver", "avg_installs", "count"]]
+            .rename(columns={"count": "apps"}).reset_index(drop=True))
+
+
+def rows(data, params):
+    """Filtered rows, one ``page`` of ``page_size`` rows or all of them without ``page``."""
+    df = search_rows(load_query_backend(data).execute(Query(query_filters(params))), params.get("search", ""))
+    sort_by = params.get("sort_by")
+    if sort_by is not None and sort_by not in df.columns:
+        raise QueryError(f"sort_by: unbekannte Spalte {sort_by}")
+    ascending = params.get("ascending", "1").lower() not in ("0", "false", "no")
+    if "page" in params:
+        df = page_rows(df, _integer(params, "page", 1), _integer(params, "page_size", 100, high=MAX_PAGE_SIZE),
+                       sort_by, ascending)
+    elif sort_by is not None:
+        df = page_rows(df, 1, max(1, len(df)), sort_by, ascending)
+    return _columns(df.reset_index(drop=True), params)
+
+
+ENDPOINTS = {
+    "categories": category_stats,
+    "top": top_apps,
+    "price-categories": price_category_counts,
+    "android-versions": android_version_installs,
+    "rows": rows,
+}
+# results small enough to keep, row pages are cheap to slice again
+CACHED_ENDPOINTS = {"categories", "top", "price-categories", "android-versions"}
+
+def run(endpoint, params, data):
+    """Result of ``endpoint`` with ``params`` (str -> str) on dataset version ``data``."""
+    if endpoint not in ENDPOINTS:
+        raise QueryError(f"Unbekannter Endpunkt: {endpoint}")
+    if endpoint not in CACHED_ENDPOINTS:
+        return ENDPOINTS[endpoint](data, params)
+    key = ("api", endpoint, data.version, tuple(sorted(params.items())))
+    return load_aggregate_cache().get_or_compute(key, lambda: ENDPOINTS[endpoint](data, params))
+
+
+def records(df):
+    """JSON text of ``df`` as an array of records."""
+    return df.to_json(orient="records", date_format="iso", force_ascii=False)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    # keep-alive and chunked responses
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        endpoint = url.path.strip("/")
+        if endpoint == "health":
+            return self.send_body(HTTPStatus.OK, "application/json", b'{"status": "ok"}')
+
+        fmt = params.pop("format", "json")
+        try:
+            if fmt not in FORMATS:
+                raise QueryError(f"format muss eine von {', '.join(FORMATS)} sein")
+            data = load_dataset()
+            result = run(endpoint, params, data)
+        except QueryError as e:
+            return self.send_error_json(HTTPStatus.NOT_FOUND if endpoint not in ENDPOINTS else HTTPStatus.BAD_REQUEST, e)
+        except Exception as e:
+            return self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR, e)
+        if fmt == "json":
+            self.send_body(HTTPStatus.OK, FORMATS[fmt], records(result).encode(), data.version)
+        else:
+            self.send_chunked(result, fmt, data.version)
+
+    def do_POST(self):
+        if urlsplit(self.path).path.strip("/") != "batch":
+            return self.send_error_json(HTTPStatus.NOT_FOUND, f"Unbekannter Endpunkt: {self.path}")
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            queries = body["queries"] if isinstance(body, dict) else body
+        except (ValueError, KeyError, TypeError):
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, 'Body muss {"queries": [...]} sein')
+
+        # every query of the batch sees the same version
+        try:
+            data = load_dataset()
+        except Exception as e:
+            return self.send_error_json(HTTPStatus.INTERNAL_SERVER_ERROR, e)
+        results = []
+        for query in queries:
+            try:
+                params = {name: str(value) for name, value in query.get("params", {}).items()}
+                results.append(records(run(query.get("endpoint"), params, data)))
+            except Exception as e:
+                # one failing query does not fail the batch
+                results.append(json.dumps({"error": str(e)}, ensure_ascii=False))
+        body = f'{{"version": {data.version}, "results": [{", ".join(results)}]}}'
+        self.send_body(HTTPStatus.OK, FORMATS["json"], body.encode(), data.version)
+
+    def send_body(self, status, content_type, body, version=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if version is not None:
+            self.send_header("X-Dataset-Version", str(version))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_body(status, FORMATS["json"], json.dumps({"error": str(message)}, ensure_ascii=False).encode())
+
+    def send_chunked(self, df, fmt, version):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", FORMATS[fmt])
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Dataset-Version", str(version))
+        self.end_headers()
+        if fmt == "ndjson":
+            for start in range(0, len(df), API_CHUNK_ROWS):
+                chunk = df.iloc[start:start + API_CHUNK_ROWS]
+                self.write_chunk(chunk.to_json(orient="records", lines=True, date_format="iso",
+                                               force_ascii=False).encode())
+        else:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.ipc.new_stream(ChunkWriter(self), table.schema) as writer:
+                for batch in table.to_batches(max_chunksize=API_CHUNK_ROWS):
+                    writer.write_batch(batch)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+class ChunkWriter:
+    """File-like sink for the Arrow stream writer, every write goes out as one HTTP chunk."""
+
+    closed = False
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def write(self, data):
+        self.handler.write_chunk(bytes(data))
+        return len(data)
+
+    def flush(self):
+        self.handler.wfile.flush()
+
+
+def start(host=API_HOST, port=API_PORT):
+    """Serve the API on a daemon thread of this process, returns the server."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    threading.Thread(target=server.serve_forever, name="dashboard-api", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless JSON/Arrow API over the dashboard data.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    # load before the port opens, like the dashboard prewarm
+    load_dataset()
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"dashboard API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
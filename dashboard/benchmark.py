@@ -0,0 +1,238 @@
+"""Headless benchmark of the dashboard pages.
+
+Every page is driven through Streamlit's AppTest with a scripted list of
+widget interactions, once per dataset size. Each (page, size) pair runs in
+its own process so peak RSS and cold start are not shared between runs.
+
+    python -m dashboard.benchmark --sizes 10000 100000 --out bench.json
+    python -m dashboard.benchmark --sizes 10000 100000 --baseline bench.json
+
+With ``--baseline`` every metric is compared against the stored run and the
+command exits with status 1 if one of them got worse by more than
+``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(ROOT, ".bench")
+
+
+# page script -> scripted widget changes, the page is rerun and timed after each one
+SCENARIOS = {
+    "Home_Page.py": [
+        lambda at: at.sidebar.selectbox[0].select("Paid"),
+        lambda at: at.sidebar.selectbox[1].select("GAME"),
+        lambda at: at.sidebar.slider[0].set_range(3.0, 4.5),
+        lambda at: at.sidebar.selectbox[0].select("Alle"),
+        lambda at: at.sidebar.selectbox[1].select("Alle"),
+        lambda at: at.sidebar.slider[0].set_range(0.0, 5.0),
+        lambda at: at.text_input[0].input("photo"),
+        lambda at: at.selectbox[0].select("Reviews"),
+        lambda at: at.text_input[0].input(""),
+        lambda at: at.selectbox[0].select("(keine)"),
+    ],
+    "pages/Ratings_Price_Paradox.py": [
+        lambda at: at.sidebar.checkbox[0].check(),
+        lambda at: at.sidebar.checkbox[1].check(),
+        lambda at: at.sidebar.selectbox[2].select("Installs"),
+        lambda at: at.sidebar.selectbox[0].select("GAME"),
+        lambda at: at.sidebar.selectbox[1].select("Gratis"),
+        lambda at: at.sidebar.selectbox[0].select("Alle"),
+        lambda at: at.sidebar.selectbox[1].select("Alle"),
+        lambda at: at.sidebar.selectbox[2].select("Reviews"),
+        lambda at: at.sidebar.checkbox[0].uncheck(),
+        lambda at: at.sidebar.checkbox[1].uncheck(),
+    ],
+    "pages/Top_Apps.py": [
+        lambda at: at.radio[0].set_value("Kreisdiagramm"),
+        lambda at: at.radio[0].set_value("Liniendiagramm"),
+        lambda at: at.radio[0].set_value("3D Bubble Chart"),
+        lambda at: at.selectbox[0].select("GAME"),
+        lambda at: at.selectbox[2].select(100),
+        lambda at: at.slider[0].set_value(0.5),
+        lambda at: at.radio[0].set_value("Balkendiagramm"),
+        lambda at: at.selectbox[0].select("Alle Kategorien"),
+        lambda at: at.selectbox[2].select(10),
+    ],
+    "pages/Android_Version.py": [
+        lambda at: at.slider[1].set_value(2012),
+        lambda at: at.slider[1].set_value(2015),
+        lambda at: at.slider[1].set_value(2018),
+        lambda at: at.multiselect[0].unselect(at.multiselect[0].value[0]),
+        lambda at: at.slider[0].set_value(0.5),
+        lambda at: at.multiselect[0].select(at.multiselect[0].options[0]),
+    ],
+}
+
+# element types counted as payload, everything else is layout
+PAYLOAD_TYPES = {"plotly_chart": "figures", "component_instance": "grid", "dataframe": "tables"}
+
+
+def timed_run(at):
+    """Rerun the page, return the wall time, raise if the page failed."""
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed
+
+
+def payload_bytes(at):
+    """Serialized bytes of the charts, grid and tables currently on the page."""
+    sizes = dict.fromkeys(PAYLOAD_TYPES.values(), 0)
+    nodes = [at._tree]
+    while nodes:
+        node = nodes.pop()
+        children = getattr(node, "children", None)
+        if isinstance(children, dict):
+            nodes.extend(children.values())
+        if getattr(node, "type", None) in PAYLOAD_TYPES:
+            sizes[PAYLOAD_TYPES[node.type]] += node.proto.ByteSize()
+    sizes["total"] = sum(sizes.values())
+    return sizes
+
+
+def run_page(page, repeats=3):
+    """Benchmark ``page`` against the dataset in DASHBOARD_DATA_PATH, in this process."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+    cold_start = timed_run(at)
+    payload = payload_bytes(at)
+
+    reruns = []
+    for _ in range(repeats):
+        for step in SCENARIOS[page]:
+            step(at)
+            reruns.append(timed_run(at))
+            payload = {key: max(payload[key], value) for key, value in payload_bytes(at).items()}
+
+    reruns = np.array(reruns)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+    return {
+        "cold_start_s": cold_start,
+        "rerun_s": {
+            "p50": float(np.percentile(reruns, 50)),
+            "p90": float(np.percentile(reruns, 90)),
+            "p99": float(np.percentile(reruns, 99)),
+            "max": float(reruns.max()),
+            "n": len(reruns),
+        },
+        "peak_rss_mb": peak_rss,
+        "max_payload_bytes": payload,
+    }
+
+
+def dataset_for(rows, seed=0):
+    """Path of a dataset with ``rows`` rows, None means the bundled CSV. Generated once and reused."""
+    if rows is None:
+        return None
+    path = os.path.join(DATASET_DIR, f"synthetic_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        import pandas as pd
+        from dashboard.settings import DATA_PATH
+        from dashboard.synthetic import SyntheticGenerator, write_dataset
+
+        os.makedirs(DATASET_DIR, exist_ok=True)
+        generator = SyntheticGenerator(pd.read_csv(os.path.join(ROOT, DATA_PATH)), seed=seed)
+        write_dataset(generator.chunks(rows), path)
+    return path
+
+
+def run_isolated(page, rows, repeats):
+    """Run one benchmark in a fresh interpreter."""
+    env = dict(os.environ)
+    dataset = dataset_for(rows)
+    if dataset is not None:
+        env["DASHBOARD_DATA_PATH"] = dataset
+    completed = subprocess.run(
+        [sys.executable, "-m", "dashboard.benchmark", "--worker", page, "--repeats", str(repeats)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"page": page, "rows": rows or "source", **result}
+
+
+def flatten(result):
+    """Numeric metrics of one result as ``{"metric.path": value}``."""
+    metrics = {"cold_start_s": result["cold_start_s"], "peak_rss_mb": result["peak_rss_mb"]}
+    metrics.update({f"rerun_s.{key}": value for key, value in result["rerun_s"].items() if key != "n"})
+    metrics.update({f"max_payload_bytes.{key}": value for key, value in result["max_payload_bytes"].items()})
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """Metrics that are more than ``tolerance`` (relative) worse than in ``baseline``."""
+    previous = {(r["page"], str(r["rows"])): flatten(r) for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["page"], str(result["rows"])))
+        if old is None:
+            continue
+        for metric, value in flatten(result).items():
+            reference = old.get(metric)
+            if reference and value > reference * (1 + tolerance):
+                regressions.append({"page": result["page"], "rows": result["rows"], "metric": metric,
+                                    "baseline": reference, "current": value})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pages headlessly.")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[],
+                        help="synthetic dataset sizes, the bundled CSV is always included")
+    parser.add_argument("--pages", nargs="*", default=list(SCENARIOS), help="page scripts to run")
+    parser.add_argument("--repeats", type=int, default=3, help="scenario repetitions per run (default: %(default)s)")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --out")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (default: %(default)s)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_page(args.worker, args.repeats)))
+        return
+
+    results = []
+    for rows in [None, *args.sizes]:
+        for page in args.pages:
+            result = run_isolated(page, rows, args.repeats)
+            print(f"{page:<32} {str(result['rows']):>10} rows  cold {result['cold_start_s']:.2f}s  "
+                  f"p50 {result['rerun_s']['p50']:.3f}s  p99 {result['rerun_s']['p99']:.3f}s  "
+                  f"rss {result['peak_rss_mb']:.0f}MB  payload {result['max_payload_bytes']['total']:,}B")
+            results.append(result)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "time": time.time()},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['page']} ({r['rows']} rows) {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Vectorized bucketing of numeric columns into ordered categorical labels."""
+import numpy as np
+import pandas as pd
+
+
+class Binner:
+    """Maps values to ``labels`` by the inner bin ``edges``.
+
+    ``edges`` are the boundaries between consecutive labels, so there is one
+    label more than edges. With ``right=True`` the bins are ``(a, b]``,
+    otherwise ``[a, b)``.
+    """
+
+    def __init__(self, edges, labels, right=True):
+        if len(labels) != len(edges) + 1:
+            raise ValueError(f"expected {len(edges) + 1} labels for {len(edges)} edges, got {len(labels)}")
+        if np.any(np.diff(edges) <= 0):
+            raise ValueError("bin edges must be strictly increasing")
+
+        self.edges = np.asarray(edges, dtype="float64")
+        self.labels = list(labels)
+        self.side = "left" if right else "right"
+
+    def codes(self, values):
+        """Label index of every value."""
+        return np.searchsorted(self.edges, np.asarray(values, dtype="float64"), side=self.side)
+
+    def __call__(self, values):
+        """Ordered categorical of the labels for ``values``."""
+        return pd.Categorical.from_codes(self.codes(values), categories=self.labels, ordered=True)
@@ -0,0 +1,48 @@
+"""Size-bounded LRU cache for aggregation results, shared by all sessions."""
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+
+class AggregateCache:
+    """Thread-safe LRU mapping of hashable keys to computed aggregates."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # compute outside the lock, a duplicate computation is cheaper than blocking every session
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def load_aggregate_cache(maxsize=256):
+    """Process wide aggregate cache."""
+    return AggregateCache(maxsize)
@@ -0,0 +1,80 @@
+"""Pre-aggregated data cube over the low-cardinality dimensions.
+
+Additive rollups (counts, sums, min/max) are answered from the cube cells,
+which are a few thousand rows instead of the whole dataset. Anything that is
+not additive (medians, top N, scatter plots) still needs the rows.
+"""
+import pandas as pd
+
+from dashboard.data import load_dataset, with_year, without_extremes
+
+DIMENSIONS = ["Category", "Type", "Price Category", "Rating Group", "Content Rating", "year_last_update"]
+MEASURES = ["Rating", "Reviews", "Installs", "Price"]
+
+
+class DataCube:
+    """count, sum, min and max of every measure per combination of dimension values."""
+
+    def __init__(self, df, dimensions=DIMENSIONS, measures=MEASURES):
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+
+        self.aggregations = {"count": (self.measures[0], "size")}
+        for measure in self.measures:
+            for func in ("sum", "min", "max"):
+                self.aggregations[f"{measure}_{func}"] = (measure, func)
+        self.cells = self.aggregate(df)
+
+        # how each measure column combines when cells are merged
+        self.rollup_funcs = {"count": "sum"}
+        for column in self.aggregations:
+            if column != "count":
+                self.rollup_funcs[column] = column.rsplit("_", 1)[1]
+
+    def aggregate(self, df):
+        # rows with missing dimension values get their own cells, the counts add up to len(df)
+        return df.groupby(self.dimensions, observed=True, dropna=False).agg(**self.aggregations).reset_index()
+
+    def updated(self, df, touched, dimension="Category"):
+        """Cube over ``df`` where only the rows of the ``touched`` values of ``dimension`` changed.
+
+        Only those cells are aggregated again, a cube without ``dimension`` is rebuilt.
+        ``touched`` may hold NaN for the rows without a value, isin matches it.
+        """
+        if dimension not in self.dimensions:
+            return DataCube(df, self.dimensions, self.measures)
+        cube = DataCube.__new__(DataCube)
+        cube.__dict__.update(self.__dict__)
+        kept = self.cells[~self.cells[dimension].isin(touched)]
+        cells = pd.concat([kept, cube.aggregate(df[df[dimension].isin(touched)])], ignore_index=True)
+        # categories may have grown, keep the dimensions categorical
+        cube.cells = cells.astype({dim: df[dim].dtype for dim in self.dimensions})
+        return cube
+
+    def rollup(self, by, filters=None):
+        """Measures grouped by the dimensions ``by``, restricted to cells matching ``filters``.
+
+        A NaN filter value selects the cells without a value, they are also kept as a group of ``by``.
+        """
+        cells = self.cells
+        for dim, value in (filters or {}).items():
+            cells = cells[cells[dim].isna() if pd.isna(value) else cells[dim] == value]
+        return cells.groupby(by, observed=True, dropna=False).agg(self.rollup_funcs)
+
+
+def load_data_cube(remove_extremes=False, data=None):
+    """Cube over a dataset version (the current one by default), optionally without the extreme values."""
+    def prepare(df):
+        df = with_year(df)
+        return without_extremes(df) if remove_extremes else df
+
+    data = data or load_dataset()
+    return data.derived(("data_cube", remove_extremes), lambda df: DataCube(prepare(df)),
+                        lambda cube, df, change: cube.updated(prepare(df), change.touched))
+
+
+def load_android_version_cube(data=None):
+    """Installs per year and Android version, the Android version page animates over it."""
+    data = data or load_dataset()
+    return data.derived("android_version_cube", lambda df: DataCube(
+        with_year(df), dimensions=["year_last_update", "Android Ver"], measures=["Installs"]))
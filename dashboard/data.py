@@ -0,0 +1,171 @@
+"""Load the Google Play dataset once per process and share it between pages."""
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dashboard import snapshot
+from dashboard.binning import Binner
+from dashboard.settings import DATA_PATH, SHARED_PATH
+
+# dtypes used while parsing the CSV
+DTYPES = {
+    "App": "object",
+    "Category": "category",
+    "Rating": "float64",
+    "Reviews": "int64",
+    "Size": "float64",
+    "Installs": "int64",
+    "Type": "category",
+    "Price": "float64",
+    "Content Rating": "category",
+    "Genres": "category",
+    "Current Ver": "object",
+    "Android Ver": "category",
+    "Day_last_update": "int64",
+    "month_last_update": "int64",
+    "year_last_update": "int64",
+}
+
+# in-memory schema: "category" for low cardinality text, "int"/"float" are downcast to the smallest
+# dtype that holds the values exactly. Day/month/year_last_update duplicate Last_Updated and are dropped.
+SCHEMA = {
+    "App": "string",
+    "Category": "category",
+    "Rating": "float",
+    "Reviews": "int",
+    "Size": "float",
+    "Installs": "int",
+    "Type": "category",
+    "Price": "float",
+    "Content Rating": "category",
+    "Genres": "category",
+    "Current Ver": "category",
+    "Android Ver": "category",
+    "Last_Updated": "date",
+}
+
+PRICE_CATEGORIES = ["Gratis", "Sehr Günstig (≤2€)", "Günstig (2€ - 10€)", "Mittelpreisig (10€ - 30€)", "Teuer (>30€)"]
+RATING_GROUPS = ["Sehr Niedrig (1.0 - 1.9)", "Niedrig (2.0 - 2.9)", "Mittel (3.0 - 3.9)", "Hoch (4.0 - 4.4)",
+                 "Sehr Hoch (4.5 - 5.0)"]
+
+# Gratis is exactly 0, the other price bins are (a, b], rating bins are [a, b)
+PRICE_BINS = Binner([0, 2, 10, 30], PRICE_CATEGORIES, right=True)
+RATING_BINS = Binner([2, 3, 4, 4.5], RATING_GROUPS, right=False)
+
+# "Extremwerte entfernen" thresholds of the price paradox page
+MAX_INSTALLS = 50_000_000
+MAX_REVIEWS = 10_000_000
+
+# rows without these values are useless for every page
+REQUIRED_COLUMNS = ["Rating", "Type", "Reviews", "Price", "Installs"]
+
+
+def downcast_float(values):
+    """float32 if it represents every value exactly, float64 otherwise."""
+    values = values.astype("float64")
+    narrow = values.astype("float32")
+    return narrow if np.array_equal(narrow.to_numpy(), values.to_numpy(), equal_nan=True) else values
+
+
+def compact(df, schema=SCHEMA):
+    """Apply ``schema`` to ``df``, columns it does not list are dropped."""
+    converters = {
+        "string": lambda values: values.astype("string"),
+        "category": lambda values: values.astype("category"),
+        "int": lambda values: pd.to_numeric(values, downcast="integer"),
+        "float": downcast_float,
+        "date": lambda values: values.astype("datetime64[s]"),
+    }
+    return pd.DataFrame({col: converters[kind](df[col]) for col, kind in schema.items()})
+
+
+def memory_report(df, baseline=None):
+    """Bytes per column of ``df``, next to ``baseline`` (e.g. a plain read_csv) if given."""
+    report = pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": df.memory_usage(index=False, deep=True)})
+    if baseline is not None:
+        # outer join so columns dropped by the schema still show up
+        baseline_bytes = baseline.memory_usage(index=False, deep=True)
+        report = report.reindex(report.index.append(baseline_bytes.index.difference(report.index, sort=False)))
+        report["baseline bytes"] = baseline_bytes
+    report.loc["total"] = report.sum(numeric_only=True)
+    report.loc["total", "dtype"] = ""
+    return report
+
+
+def read_dataset(path=DATA_PATH):
+    """Parse the CSV into the compact schema and drop incomplete rows."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Die Datei {path} wurde nicht gefunden.")
+
+    # Reviews may contain thousands separators in older exports
+    df = pd.read_csv(path, dtype={**DTYPES, "Reviews": "object"})
+    df = df.dropna(subset=REQUIRED_COLUMNS)
+    df["Reviews"] = df["Reviews"].str.replace(",", "", regex=False).astype("int64")
+    df["Last_Updated"] = pd.to_datetime(df["Last_Updated"], errors="coerce", format="%Y-%m-%d")
+
+    return compact(df.reset_index(drop=True))
+
+
+def add_derived_columns(df):
+    """Add price category, rating group and log scaled reviews/installs."""
+    return df.assign(**{
+        "Price Category": PRICE_BINS(df["Price"]),
+        "Rating Group": RATING_BINS(df["Rating"]),
+        "Log Reviews": np.log10(df["Reviews"] + 1).astype("float32"),
+        "Log Installs": np.log10(df["Installs"] + 1).astype("float32"),
+    })
+
+
+def with_year(df):
+    """Add ``year_last_update`` back from Last_Updated for year based grouping."""
+    return df.assign(year_last_update=df["Last_Updated"].dt.year)
+
+
+def without_extremes(df):
+    """Drop apps above the extreme installs/reviews thresholds."""
+    return df[(df["Installs"] <= MAX_INSTALLS) & (df["Reviews"] <= MAX_REVIEWS)]
+
+
+def open_dataset(path=DATA_PATH, shared_path=SHARED_PATH):
+    """Map the snapshot of ``path``, rebuilding it first if the CSV changed.
+
+    With ``shared_path`` the snapshot published there is mapped as is, the
+    first process to find it missing publishes it for the others.
+    """
+    if shared_path:
+        df = snapshot.read_snapshot(shared_path)
+        if df is not None:
+            return df
+        try:
+            return snapshot.read_snapshot(snapshot.publish_snapshot(path, shared_path))
+        except OSError as e:
+            warnings.warn(f"could not publish snapshot {shared_path}: {e}")
+
+    source_hash = snapshot.file_hash(path) if os.path.exists(path) else None
+    snapshot_file = snapshot.snapshot_path(path)
+
+    df = snapshot.read_snapshot(snapshot_file, source_hash)
+    if df is not None:
+        return df
+
+    df = add_derived_columns(read_dataset(path))
+    try:
+        snapshot.write_snapshot(df, snapshot_file, source_hash)
+    except OSError as e:
+        # read-only deployments still work, they just parse on every start
+        warnings.warn(f"could not write snapshot {snapshot_file}: {e}")
+    return df
+
+
+def load_dataset(path=DATA_PATH):
+    """Current version of the shared dataset with the delta files applied (see dashboard.refresh)."""
+    from dashboard.refresh import load_store
+
+    return load_store(path).current_version()
+
+
+def load_data(path=DATA_PATH):
+    """Return the shared dataset. Every session gets the same frame, do not modify it in place."""
+    return load_dataset(path).df
@@ -0,0 +1,56 @@
+"""Server-side downsampling so scatter plots stay within a point budget."""
+import numpy as np
+import pandas as pd
+
+from dashboard.settings import POINT_BUDGET
+
+# share of the budget reserved for the extreme values of the plotted columns
+EXTREMES_SHARE = 0.1
+
+
+def extreme_positions(values, n):
+    """Positions of the ``n // 2`` smallest and ``n - n // 2`` largest values."""
+    n = min(n, len(values))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    order = np.argsort(values, kind="stable")
+    return np.concatenate([order[:n // 2], order[len(order) - (n - n // 2):]])
+
+
+def stratified_positions(strata, candidates, n, rng):
+    """Sample ``n`` of the ``candidates`` positions, proportionally to their stratum sizes."""
+    groups, inverse = np.unique(strata[candidates], return_inverse=True)
+    picked = []
+    for group in range(len(groups)):
+        members = candidates[inverse == group]
+        quota = int(round(n * len(members) / len(candidates)))
+        picked.append(rng.choice(members, size=min(quota, len(members)), replace=False))
+    return np.concatenate(picked) if picked else np.empty(0, dtype=np.intp)
+
+
+def downsample(df, budget=POINT_BUDGET, stratify=None, extremes=(), seed=0):
+    """At most about ``budget`` rows of ``df``.
+
+    The smallest and largest values of every ``extremes`` column are always
+    kept so outliers stay visible, the rest is a sample stratified by the
+    ``stratify`` column. The seed is fixed so reruns show the same points.
+    """
+    if len(df) <= budget:
+        return df
+
+    keep = np.zeros(len(df), dtype=bool)
+    if extremes:
+        per_column = int(budget * EXTREMES_SHARE) // len(extremes)
+        for col in extremes:
+            keep[extreme_positions(df[col].to_numpy(), per_column)] = True
+
+    candidates = np.flatnonzero(~keep)
+    remaining = budget - int(keep.sum())
+    rng = np.random.default_rng(seed)
+    if stratify is None:
+        keep[rng.choice(candidates, size=remaining, replace=False)] = True
+    else:
+        strata = pd.factorize(df[stratify])[0]
+        keep[stratified_positions(strata, candidates, remaining, rng)] = True
+
+    return df.iloc[np.flatnonzero(keep)]
@@ -0,0 +1,89 @@
+"""Genres inverted index, Genres holds ';' separated lists like "Art & Design;Pretend Play".
+
+Apps are mapped to genres through their Genres category code: a small
+membership matrix (distinct Genres values x single genres) replaces an
+app x genre matrix, and the inverted index maps every genre to its rows.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import load_dataset
+
+SEPARATOR = ";"
+
+
+class GenreIndex:
+    """Row ids per single genre plus the genre membership of every Genres value."""
+
+    def __init__(self, df, column="Genres"):
+        self.column = column
+        self._build_membership(df)
+
+        codes = df[column].cat.codes.to_numpy()
+        self.rows_by_genre = {
+            genre: np.flatnonzero(np.isin(codes, np.flatnonzero(self.membership[:, i])))
+            for i, genre in enumerate(self.genres)
+        }
+
+    def _build_membership(self, df):
+        self.n_rows = len(df)
+        combinations = df[self.column].cat.categories
+        self.genres = sorted({genre for value in combinations for genre in value.split(SEPARATOR)})
+        positions = {genre: i for i, genre in enumerate(self.genres)}
+
+        # membership[code, genre] is True if that Genres value lists the genre
+        self.membership = np.zeros((len(combinations), len(self.genres)), dtype=bool)
+        for code, value in enumerate(combinations):
+            self.membership[code, [positions[genre] for genre in value.split(SEPARATOR)]] = True
+
+    def updated(self, df, change):
+        """Index over ``df`` after ``change``, the kept row lists are only renumbered."""
+        index = GenreIndex.__new__(GenreIndex)
+        index.column = self.column
+        index._build_membership(df)
+
+        codes = change.added[self.column].cat.codes.to_numpy()
+        empty = np.empty(0, dtype=np.intp)
+        index.rows_by_genre = {
+            genre: np.concatenate([change.remap(self.rows_by_genre.get(genre, empty)),
+                                   np.flatnonzero((codes >= 0) & index.membership[codes, i]) + change.offset])
+            for i, genre in enumerate(index.genres)
+        }
+        return index
+
+    def rows(self, genres, mode="any"):
+        """Sorted row ids listing any (union) or all (intersection) of ``genres``."""
+        row_sets = [self.rows_by_genre.get(genre, np.empty(0, dtype=np.intp)) for genre in genres]
+        if not row_sets:
+            return np.arange(self.n_rows)
+        combine = np.union1d if mode == "any" else np.intersect1d
+        return reduce(combine, row_sets)
+
+    def aggregate(self, df, measures=("Rating", "Installs")):
+        """App count plus sum and mean of ``measures`` per genre, an app counts for each of its genres."""
+        codes = df[self.column].cat.codes.to_numpy()
+        # rows without Genres (code -1) belong to no genre
+        listed = codes >= 0
+        codes = codes[listed]
+        n_codes = len(self.membership)
+        weights = self.membership.T.astype("float64")
+
+        counts = weights @ np.bincount(codes, minlength=n_codes)
+        result = {"count": counts.astype("int64")}
+        for measure in measures:
+            values = df[measure].to_numpy(dtype="float64")[listed]
+            sums = weights @ np.bincount(codes, weights=values, minlength=n_codes)
+            result[f"{measure}_sum"] = sums
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result[f"{measure}_mean"] = sums / counts
+
+        stats = pd.DataFrame(result, index=pd.Index(self.genres, name="Genre"))
+        return stats[stats["count"] > 0]
+
+
+def load_genre_index(data=None):
+    """Genre index of a dataset version (the current one by default), built once per version."""
+    data = data or load_dataset()
+    return data.derived("genre_index", GenreIndex, GenreIndex.updated)
@@ -0,0 +1,44 @@
+"""Server-side paging for the exploration grid, only the visible rows reach the browser."""
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def search_rows(df, text, column="App"):
+    """Rows whose ``column`` contains ``text`` (case-insensitive), all rows for an empty search."""
+    if not text:
+        return df
+    return df[df[column].astype(str).str.contains(text, case=False, regex=False)]
+
+
+def page_count(n_rows, page_size):
+    """Number of pages, at least one so an empty result still has a page."""
+    return max(1, -(-n_rows // page_size))
+
+
+def page_rows(df, page, page_size, sort_by=None, ascending=True):
+    """Rows of the 1-based ``page`` after sorting by ``sort_by``.
+
+    Only row positions are sorted, the frame itself is never reordered or
+    copied beyond the returned window.
+    """
+    start = (page - 1) * page_size
+    if sort_by is None:
+        return df.iloc[start:start + page_size]
+
+    # pandas order: categories by their order, missing values last in both directions
+    order = (df[sort_by].reset_index(drop=True)
+             .sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy())
+    return df.iloc[order[start:start + page_size]]
+
+
+def grid_options(columns):
+    """AgGrid options for one page of rows.
+
+    Header sorting and the column filters would only act on the page in the
+    browser, search and sort go through ``search_rows``/``page_rows`` instead.
+    """
+    return {
+        "defaultColDef": {"sortable": False, "filter": False, "suppressHeaderMenuButton": True},
+        "columnDefs": [{"field": column, "headerName": column} for column in columns],
+        "autoSizeStrategy": {"type": "fitGridWidth"},
+    }
@@ -0,0 +1,102 @@
+"""Precomputed filter index so sidebar filters don't scan the whole frame."""
+import numpy as np
+
+from dashboard.data import load_dataset
+
+
+class FilterIndex:
+    """Row-id bitmaps for categorical columns and sorted arrays for numeric ranges."""
+
+    def __init__(self, df, categorical=("Type", "Category"), numeric=("Rating", "Reviews")):
+        self.n_rows = len(df)
+
+        # one boolean bitmap per category value
+        self.bitmaps = {}
+        for col in categorical:
+            codes = df[col].cat.codes.to_numpy()
+            self.bitmaps[col] = {value: codes == code for code, value in enumerate(df[col].cat.categories)}
+
+        # row ids ordered by value, plus the sorted values for binary search
+        self.sorted = {}
+        for col in numeric:
+            values = df[col].to_numpy()
+            order = np.argsort(values, kind="stable")
+            self.sorted[col] = (order, values[order])
+
+    def bitmap(self, col, value):
+        """Bitmap of the rows where ``col == value``."""
+        mask = self.bitmaps[col].get(value)
+        return mask if mask is not None else np.zeros(self.n_rows, dtype=bool)
+
+    def range_positions(self, col, low, high):
+        """Slice of the sorted ``col`` array holding ``low <= value <= high``, None if that is every row."""
+        _, values = self.sorted[col]
+        start = int(np.searchsorted(values, low, side="left"))
+        stop = int(np.searchsorted(values, high, side="right"))
+        if start == 0 and stop == self.n_rows:
+            return None
+        return start, stop
+
+    def range_bitmap(self, col, start, stop):
+        """Bitmap of the rows in positions ``start:stop`` of the sorted ``col`` array."""
+        order, _ = self.sorted[col]
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+
+    def updated(self, df, change):
+        """Index over ``df`` after ``change``, only the added rows are indexed from scratch."""
+        index = FilterIndex.__new__(FilterIndex)
+        index.n_rows = len(df)
+
+        index.bitmaps = {}
+        for col, bitmaps in self.bitmaps.items():
+            codes = change.added[col].cat.codes.to_numpy()
+            empty = np.zeros(len(change.keep), dtype=bool)
+            index.bitmaps[col] = {
+                value: np.concatenate([bitmaps.get(value, empty)[change.keep], codes == code])
+                for code, value in enumerate(df[col].cat.categories)
+            }
+
+        # merge the sorted added rows into the kept order instead of sorting again
+        index.sorted = {}
+        for col, (order, values) in self.sorted.items():
+            added_values = change.added[col].to_numpy()
+            added_order = np.argsort(added_values, kind="stable")
+            at = np.searchsorted(values[change.keep[order]], added_values[added_order], side="right")
+            order = np.insert(change.remap(order), at, added_order + change.offset)
+            index.sorted[col] = (order, df[col].to_numpy()[order])
+        return index
+
+    def signature(self, equals=None, ranges=None):
+        """Hashable key of a filter state. Ranges selecting the same rows give the same key.
+
+        Ranges are snapped to the values they select rather than to positions,
+        so a key stays meaningful after the index is updated.
+        """
+        snapped = []
+        for col, (low, high) in sorted((ranges or {}).items()):
+            positions = self.range_positions(col, low, high)
+            if positions is not None:
+                _, values = self.sorted[col]
+                start, stop = positions
+                snapped.append((col, (values[start].item(), values[stop - 1].item()) if start < stop else ()))
+        return tuple(sorted((equals or {}).items())), tuple(snapped)
+
+    def select(self, equals=None, ranges=None):
+        """Row ids (ascending) matching all ``equals`` values and inclusive ``ranges``."""
+        masks = [self.bitmap(col, value) for col, value in (equals or {}).items()]
+        for col, (low, high) in (ranges or {}).items():
+            positions = self.range_positions(col, low, high)
+            if positions is not None:
+                masks.append(self.range_bitmap(col, *positions))
+
+        if not masks:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.logical_and.reduce(masks))
+
+
+def load_filter_index(data=None):
+    """Filter index of a dataset version (the current one by default), built once per version."""
+    data = data or load_dataset()
+    return data.derived("filter_index", FilterIndex, FilterIndex.updated)
@@ -0,0 +1,244 @@
+"""Pre-rendered chart results for the filter states most users look at.
+
+    python -m dashboard.prerender [--workers 8] [--out prerendered]
+
+runs the pages in a process pool, once with their default widget values and
+once per single Category or Type selection, and stores the results of their
+chart tasks (figures as plotly JSON, tables and aggregates pickled) keyed by
+page scope and widget state. The pages look their state up before building
+anything and only compute the states that are not in the store:
+
+    prerendered = prerender.lookup("Home_Page", state, dataset)
+    tasks = TaskGraph("Home_Page", trace, prerendered=prerendered)
+    ...
+    prerender.record("Home_Page", state, tasks)
+
+The store belongs to the CSV, the page and dashboard code and the point
+budgets it was built with, it is ignored once one of them changes (a deploy
+with new figure code) or deltas were applied (dashboard.refresh). Server
+processes read the manifest once, restart them after a rebuild.
+"""
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import streamlit as st
+
+from dashboard.settings import DATA_PATH, POINT_BUDGET, POINT_BUDGET_3D, PRERENDER_DIR
+from dashboard.snapshot import file_hash
+from dashboard.startup import ROOT
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# directory the page results are written to, only set in the workers of ``build``
+_build_dir = None
+
+
+@dataclass(frozen=True)
+class FigureJSON:
+    """A figure as stored, decoded back into a plotly Figure when it is loaded."""
+    json: str
+
+
+def encode(value):
+    # only called by builds, the pages import plotly lazily
+    from plotly.basedatatypes import BaseFigure
+
+    if isinstance(value, BaseFigure):
+        return FigureJSON(value.to_json())
+    if isinstance(value, tuple):
+        return tuple(encode(item) for item in value)
+    return value
+
+
+def decode(value):
+    if isinstance(value, FigureJSON):
+        import plotly.io as pio
+
+        return pio.from_json(value.json)
+    if isinstance(value, tuple):
+        return tuple(decode(item) for item in value)
+    return value
+
+
+def state_key(scope, state):
+    """File name stem of ``state`` (a tuple of widget values) of page scope ``scope``."""
+    return hashlib.sha1(repr((scope, state)).encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def code_hash(root=ROOT):
+    """sha256 over the pages and the dashboard package, every figure is built by this code."""
+    digest = hashlib.sha256()
+    for pattern in ("*.py", "pages/*.py", "dashboard/*.py"):
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(path, root).encode())
+            digest.update(file_hash(path).encode())
+    return digest.hexdigest()
+
+
+def build_signature(path=DATA_PATH):
+    """What the stored results depend on besides the widget state."""
+    return {"data_hash": file_hash(path), "code_hash": code_hash(),
+            "point_budget": POINT_BUDGET, "point_budget_3d": POINT_BUDGET_3D}
+
+
+class PrerenderStore:
+    """Results in ``directory``, decoded on first use and then shared by all sessions."""
+
+    def __init__(self, directory, keys):
+        self.directory = directory
+        self.keys = frozenset(keys)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope, state):
+        """Task results of ``scope`` in ``state`` by task name, None if the state is not stored."""
+        key = state_key(scope, state)
+        if key not in self.keys:
+            return None
+        with self._lock:
+            if key not in self._entries:
+                with open(os.path.join(self.directory, f"{key}.pkl"), "rb") as f:
+                    self._entries[key] = {name: decode(value) for name, value in pickle.load(f).items()}
+            return self._entries[key]
+
+
+@st.cache_resource(show_spinner=False)
+def load_prerender_store(directory=PRERENDER_DIR):
+    """Store in ``directory``, None if there is none or it was built for other data or settings."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_VERSION or manifest.get("build") != build_signature():
+            return None
+    except FileNotFoundError:
+        return None
+    return PrerenderStore(directory, manifest["keys"])
+
+
+def lookup(scope, state, data, directory=PRERENDER_DIR):
+    """Pre-rendered task results of ``scope`` in ``state``, None if they have to be built."""
+    # the store holds the version without deltas, and a build must not read the previous one
+    if _build_dir is not None or data.version != 0:
+        return None
+    store = load_prerender_store(directory)
+    return store.get(scope, state) if store is not None else None
+
+
+def record(scope, state, tasks):
+    """Write the task results of this rerun when running inside ``build``, does nothing otherwise."""
+    if _build_dir is None:
+        return
+    outputs = {name: encode(future.result()) for name, future in tasks.futures.items()}
+    with open(os.path.join(_build_dir, f"{state_key(scope, state)}.pkl"), "wb") as f:
+        pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def single_selections(page, defaults, options):
+    """(page, state) pairs for the defaults and every single selection, a state sets all widgets in ``defaults``."""
+    states = [defaults]
+    for widget, values in options.items():
+        states += [{**defaults, widget: value} for value in values if value != defaults[widget]]
+    return [(page, state) for state in states]
+
+
+def common_states(df):
+    """Widget states to pre-render, widgets are (element path, index) pairs as AppTest addresses them."""
+    categories = df["Category"].dropna().unique().tolist()
+    home_type, home_category = ("sidebar.selectbox", 0), ("sidebar.selectbox", 1)
+    ratings_category = ("sidebar.selectbox", 0)
+    top_category = ("selectbox", 0)
+    return [
+        *single_selections("Home_Page.py", {home_type: "Alle", home_category: "Alle"},
+                           {home_type: df["Type"].dropna().unique().tolist(), home_category: categories}),
+        *single_selections("pages/Ratings_Price_Paradox.py", {ratings_category: "Alle"},
+                           {ratings_category: categories}),
+        *single_selections("pages/Top_Apps.py", {top_category: "Alle Kategorien"}, {top_category: categories}),
+    ]
+
+
+def build_chunk(page, states, directory):
+    """Run ``page`` once per state with its results written to ``directory``, returns the errors."""
+    global _build_dir
+    from streamlit.testing.v1 import AppTest
+
+    _build_dir = directory
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+    # the first run creates the widgets
+    at.run()
+    errors = []
+    for state in states:
+        for (element, index), value in state.items():
+            functools.reduce(getattr, element.split("."), at)[index].set_value(value)
+        at.run()
+        errors += [f"{page} {state}: {e.message}" for e in at.exception]
+    return errors
+
+
+def build(directory=PRERENDER_DIR, workers=os.cpu_count()):
+    """Pre-render all common states into ``directory``, returns the exit status."""
+    from dashboard.data import load_data
+
+    start = time.perf_counter()
+    states = common_states(load_data())
+    by_page = {}
+    for page, state in states:
+        by_page.setdefault(page, []).append(state)
+
+    # built next to the old store and swapped in only if every state succeeded
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_chunk, page, page_states[i::workers], tmp_dir)
+                   for page, page_states in by_page.items() for i in range(min(workers, len(page_states)))]
+        errors = [error for future in futures for error in future.result()]
+    if errors:
+        print("\n".join(errors), file=sys.stderr)
+        shutil.rmtree(tmp_dir)
+        return 1
+
+    keys = sorted(name[:-len(".pkl")] for name in os.listdir(tmp_dir) if name.endswith(".pkl"))
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+        json.dump({"format": FORMAT_VERSION, "build": build_signature(), "keys": keys}, f)
+    old_dir = f"{directory}.old"
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"{len(states)} states, {len(keys)} results, {size / 1024 ** 2:.1f}MB in {directory} "
+          f"({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render the charts of the common filter states.")
+    parser.add_argument("--out", default=PRERENDER_DIR, help="store directory (DASHBOARD_PRERENDER_DIR)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="build processes")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out)
+    # the pages read the logo and the dataset relative to the repository root
+    os.chdir(ROOT)
+    sys.exit(build(out, max(1, args.workers)))
+
+
+if __name__ == "__main__":
+    # through the package module, so the workers and the pages share its _build_dir
+    from dashboard.prerender import main as prerender_main
+
+    prerender_main()
@@ -0,0 +1,213 @@
+"""Query backends behind the page filters and group-bys.
+
+A Query only describes what a chart needs (filters, group keys, measures,
+order and limit), the backend decides how to run it. The pandas backend works
+on the shared in-memory frame. The DuckDB backend scans the Arrow snapshot on
+disk with all cores and pushes the filters and the column selection down into
+the scan, which pays off for datasets far bigger than the Play Store one.
+
+Select the backend with DASHBOARD_QUERY_BACKEND, duckdb is an optional
+dependency (``pip install duckdb``).
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dashboard.data import DATA_PATH, load_dataset
+from dashboard.settings import QUERY_BACKEND
+from dashboard.snapshot import FORMAT_VERSION, HASH_KEY, VERSION_KEY, file_hash, snapshot_path
+
+# Genres style columns hold lists joined by this separator (has_any / has_all filters)
+SEPARATOR = ";"
+
+PANDAS_FUNCS = {"count": "size", "sum": "sum", "mean": "mean", "min": "min", "max": "max"}
+SQL_FUNCS = {"count": "count(*)", "sum": "sum({})", "mean": "avg({})", "min": "min({})", "max": "max({})"}
+
+
+@dataclass(frozen=True)
+class Query:
+    """Engine independent description of one query, hashable so it works as a cache key.
+
+    ``filters`` are (column, op, value) tuples with op one of ==, in, between,
+    <=, >=, has_any, has_all (values of in/between/has_* are tuples).
+    ``measures`` are (name, func, column) tuples with func one of count, sum,
+    mean, min, max. Without group keys and measures the query returns the
+    matching rows, restricted to ``columns`` if given. ``order_by`` holds
+    (column, ascending) pairs.
+    """
+    filters: tuple = ()
+    group_by: tuple = ()
+    measures: tuple = ()
+    columns: tuple = ()
+    order_by: tuple = ()
+    limit: int = None
+
+
+def filters_from(equals=None, ranges=None):
+    """Query filters for the pages' ``equals`` values and inclusive ``ranges``."""
+    filters = [(col, "==", value) for col, value in (equals or {}).items()]
+    filters += [(col, "between", (low, high)) for col, (low, high) in (ranges or {}).items()]
+    return tuple(filters)
+
+
+class PandasBackend:
+    """Runs queries on an in-memory DataFrame."""
+
+    name = "pandas"
+
+    def __init__(self, df):
+        self.df = df
+
+    def mask(self, column, op, value):
+        values = self.df[column]
+        if op == "==":
+            return (values == value).to_numpy()
+        if op == "in":
+            return values.isin(value).to_numpy()
+        if op == "between":
+            return ((values >= value[0]) & (values <= value[1])).to_numpy()
+        if op == "<=":
+            return (values <= value).to_numpy()
+        if op == ">=":
+            return (values >= value).to_numpy()
+        if op in ("has_any", "has_all"):
+            # decided once per distinct value, the rows follow through their category codes
+            wanted = set(value)
+            check = (lambda parts: bool(wanted & parts)) if op == "has_any" else wanted.issubset
+            matches = [check(set(category.split(SEPARATOR))) for category in values.cat.categories]
+            # code -1 (missing) picks the trailing False
+            return np.array(matches + [False])[values.cat.codes.to_numpy()]
+        raise ValueError(f"Unbekannter Filter-Operator: {op}")
+
+    def execute(self, query):
+        rows = self.df
+        if query.filters:
+            rows = rows[np.logical_and.reduce([self.mask(*f) for f in query.filters])]
+
+        if query.group_by:
+            aggregations = {name: (column or query.group_by[0], PANDAS_FUNCS[func]) for name, func, column in query.measures}
+            result = rows.groupby(list(query.group_by), observed=True).agg(**aggregations).reset_index()
+        elif query.measures:
+            result = pd.DataFrame({name: [rows[column].agg(PANDAS_FUNCS[func]) if func != "count" else len(rows)]
+                                   for name, func, column in query.measures})
+        else:
+            # rows are ordered before the projection, the sort key need not be selected
+            rows = self.order(rows, query.order_by, query.limit)
+            return rows[list(query.columns)] if query.columns else rows
+        return self.order(result, query.order_by, query.limit)
+
+    @staticmethod
+    def order(df, order_by, limit):
+        if len(order_by) == 1 and limit is not None and pd.api.types.is_numeric_dtype(df[order_by[0][0]]):
+            # top n without sorting everything
+            column, ascending = order_by[0]
+            return df.nsmallest(limit, column) if ascending else df.nlargest(limit, column)
+        if order_by:
+            columns, ascending = zip(*order_by)
+            df = df.sort_values(list(columns), ascending=list(ascending), kind="stable")
+        return df if limit is None else df.head(limit)
+
+
+class DuckDBBackend:
+    """Runs queries as SQL in an in-process DuckDB over ``source`` (Arrow dataset, table or DataFrame)."""
+
+    name = "duckdb"
+
+    def __init__(self, source):
+        import duckdb
+
+        self.connection = duckdb.connect()
+        self.source = source
+
+    @staticmethod
+    def quote(column):
+        return '"' + column.replace('"', '""') + '"'
+
+    def condition(self, column, op, value):
+        column = self.quote(column)
+        if op == "==":
+            return f"{column} = ?", [value]
+        if op == "in":
+            return f"{column} IN ?", [list(value)]
+        if op == "between":
+            return f"{column} BETWEEN ? AND ?", list(value)
+        if op in ("<=", ">="):
+            return f"{column} {op} ?", [value]
+        if op in ("has_any", "has_all"):
+            return f"list_{op}(string_split({column}, '{SEPARATOR}'), ?)", [list(value)]
+        raise ValueError(f"Unbekannter Filter-Operator: {op}")
+
+    def sql(self, query):
+        """SQL text and parameters of ``query`` against the ``apps`` table."""
+        if query.group_by or query.measures:
+            select = [self.quote(column) for column in query.group_by]
+            select += [f"{SQL_FUNCS[func].format(self.quote(column or ''))} AS {self.quote(name)}"
+                       for name, func, column in query.measures]
+        else:
+            select = [self.quote(column) for column in query.columns] or ["*"]
+        sql = f"SELECT {', '.join(select)} FROM apps"
+
+        params = []
+        if query.filters:
+            conditions = []
+            for f in query.filters:
+                condition, values = self.condition(*f)
+                conditions.append(condition)
+                params += values
+            sql += " WHERE " + " AND ".join(conditions)
+        if query.group_by:
+            sql += " GROUP BY " + ", ".join(self.quote(column) for column in query.group_by)
+        if query.order_by:
+            sql += " ORDER BY " + ", ".join(f"{self.quote(column)} {'ASC' if ascending else 'DESC'}"
+                                            for column, ascending in query.order_by)
+        if query.limit is not None:
+            sql += f" LIMIT {int(query.limit)}"
+        # numpy scalars from the frames are not valid parameters
+        return sql, [value.item() if isinstance(value, np.generic) else value for value in params]
+
+    def execute(self, query):
+        # a cursor per query, a DuckDB connection must not be shared between threads
+        cursor = self.connection.cursor()
+        try:
+            cursor.register("apps", self.source)
+            return cursor.execute(*self.sql(query)).df()
+        finally:
+            cursor.close()
+
+
+def current_snapshot(csv_path):
+    """Arrow dataset over the snapshot of ``csv_path``, None if it is missing or outdated."""
+    import pyarrow.dataset as ds
+
+    path = snapshot_path(csv_path)
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+    dataset = ds.dataset(path, format="ipc")
+    metadata = dataset.schema.metadata or {}
+    if metadata.get(VERSION_KEY) != FORMAT_VERSION or metadata.get(HASH_KEY) != file_hash(csv_path).encode():
+        return None
+    return dataset
+
+
+def build_backend(df, name=QUERY_BACKEND, path=DATA_PATH):
+    """Backend ``name`` over ``df``, the DuckDB one scans the snapshot of ``path`` if it holds ``df``."""
+    if name == "pandas":
+        return PandasBackend(df)
+    if name == "duckdb":
+        try:
+            import duckdb  # noqa: F401
+        except ImportError as error:
+            raise ImportError("DASHBOARD_QUERY_BACKEND=duckdb braucht das Paket duckdb (pip install duckdb).") from error
+        snapshot = current_snapshot(path) if path is not None else None
+        return DuckDBBackend(snapshot if snapshot is not None else df)
+    raise ValueError(f"Unbekanntes Query-Backend: {name}")
+
+
+def load_query_backend(data=None, name=QUERY_BACKEND):
+    """Query backend over a dataset version (the current one by default), chosen by DASHBOARD_QUERY_BACKEND."""
+    data = data or load_dataset()
+    # the snapshot on disk only matches the version without deltas
+    return data.derived(("query_backend", name),
+                        lambda df: build_backend(df, name, DATA_PATH if data.version == 0 else None))
@@ -0,0 +1,232 @@
+"""Incremental refresh of the shared dataset from delta files.
+
+Delta files are CSVs in the google_clean_v3 format dropped into DELTA_DIR and
+applied in name order, so name them by date (``2026-10-18.csv``). Rows of a
+delta replace every row of the same App (upsert); files ending in
+``.append.csv`` only add rows. Applied files are never read again, write new
+files instead of editing old ones. A restart applies the whole directory on
+top of the CSV again.
+
+Write a delta under a temporary name and rename it into place once it is
+complete (``2026-10-18.csv.tmp`` -> ``2026-10-18.csv``, the rename is atomic
+on one file system). Dotfiles and names not ending in ``.csv`` are ignored,
+and files modified within the last DELTA_SETTLE_SECONDS are left for the next
+poll in case a writer copies them in place. A delta that fails to parse is
+not applied and retried once its file changes.
+
+Deltas are applied on a background thread of the store. It builds the next
+version and brings the incremental structures of the current one up to it
+before publishing it as ``current``, reruns only ever read ``current``.
+
+Every applied delta creates a new DataVersion. Pages take one version per
+rerun so the frame and its indexes always match. Derived structures (indexes,
+cubes, backends) are built once per version, incrementally from the previous
+version where the structure supports it, and the per-category version
+counters keep cached results of untouched categories valid.
+"""
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dashboard.data import add_derived_columns, open_dataset, read_dataset
+from dashboard.settings import DELTA_DIR, DELTA_POLL_SECONDS, DELTA_SETTLE_SECONDS
+
+APPEND_SUFFIX = ".append.csv"
+
+
+class Change:
+    """Row changes from one version to the next, the ``keep`` rows come first, then ``added``."""
+
+    def __init__(self, keep, added, touched):
+        self.keep = keep
+        self.added = added
+        # categories with removed or added rows
+        self.touched = touched
+        self.offset = int(keep.sum())
+        self.new_ids = np.cumsum(keep) - 1
+
+    def remap(self, ids):
+        """New ids of the previous rows ``ids``, removed rows are dropped, the order is kept."""
+        ids = np.asarray(ids)
+        return self.new_ids[ids[self.keep[ids]]]
+
+    def added_ids(self):
+        return np.arange(self.offset, self.offset + len(self.added))
+
+
+def read_delta(path):
+    """Delta file with the derived columns, and its mode ("upsert" or "append")."""
+    mode = "append" if path.endswith(APPEND_SUFFIX) else "upsert"
+    return add_derived_columns(read_dataset(path)), mode
+
+
+def align_categories(df, delta):
+    """``df`` and ``delta`` with the same categories, new ones are appended so existing codes stay valid."""
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and not df[col].cat.ordered:
+            categories = df[col].cat.categories
+            extra = delta[col].cat.categories.difference(categories, sort=False)
+            if len(extra):
+                categories = categories.append(extra)
+                df = df.assign(**{col: df[col].cat.set_categories(categories)})
+            columns[col] = delta[col].cat.set_categories(categories)
+    return df, delta.assign(**columns)
+
+
+class DataVersion:
+    """One immutable state of the dataset plus the structures derived from it."""
+
+    def __init__(self, df, version=0, category_versions=None, previous=None, change=None):
+        self.df = df
+        self.version = version
+        self.category_versions = category_versions or {}
+        self.previous = previous
+        self.change = change
+        self._derived = {}
+        self._updates = {}
+        self._lock = threading.Lock()
+
+    def version_of(self, category=None):
+        """Version that last changed ``category``, the dataset version for all categories."""
+        if category is None:
+            return self.version
+        return self.category_versions.get(category, 0)
+
+    def derived(self, name, build, update=None):
+        """Structure ``name`` of this version: ``update(previous value, df, change)`` if the
+        previous version has one, ``build(df)`` otherwise."""
+        with self._lock:
+            if name not in self._derived:
+                previous = self.previous
+                if update is not None and previous is not None and name in previous._derived:
+                    self._derived[name] = update(previous._derived[name], self.df, self.change)
+                else:
+                    self._derived[name] = build(self.df)
+                if update is not None:
+                    self._updates[name] = (build, update)
+            return self._derived[name]
+
+    def update_derived(self):
+        """Bring the incremental structures of the previous version up to this one.
+
+        Structures without an update function are cheap to build, the first reader builds them.
+        """
+        if self.previous is None:
+            return
+        with self.previous._lock:
+            updates = dict(self.previous._updates)
+        for name, (build, update) in updates.items():
+            self.derived(name, build, update)
+
+    def applied(self, delta, mode="upsert"):
+        """Next version with ``delta`` upserted (keyed by App) or appended."""
+        if mode == "upsert":
+            keep = ~self.df["App"].isin(delta["App"]).to_numpy()
+        else:
+            keep = np.ones(len(self.df), dtype=bool)
+        base, delta = align_categories(self.df, delta)
+        df = pd.concat([base[keep], delta], ignore_index=True)
+
+        touched = set(self.df["Category"][~keep]) | set(delta["Category"])
+        version = self.version + 1
+        category_versions = {**self.category_versions, **dict.fromkeys(touched, version)}
+        change = Change(keep, df.iloc[int(keep.sum()):], touched)
+
+        # only one step back is kept, older frames can be freed
+        self.previous = None
+        return DataVersion(df, version, category_versions, previous=self, change=change)
+
+
+class DataStore:
+    """Current version of one dataset, ``start`` polls DELTA_DIR for new delta files in the background.
+
+    The files already in DELTA_DIR are applied when the store is created, so
+    the first version served after a restart has them.
+    """
+
+    def __init__(self, path, delta_dir=DELTA_DIR, poll_seconds=DELTA_POLL_SECONDS,
+                 settle_seconds=DELTA_SETTLE_SECONDS):
+        self.current = DataVersion(open_dataset(path))
+        self.delta_dir = delta_dir
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.applied_files = set()
+        # name -> mtime of deltas that failed, retried once the file changes
+        self.failed_files = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        self.poll()
+
+    def pending_files(self):
+        """(name, mtime) of the complete delta files not applied yet, in name order."""
+        if not os.path.isdir(self.delta_dir):
+            return []
+        now = time.time()
+        pending = []
+        for name in sorted(os.listdir(self.delta_dir)):
+            if name.startswith(".") or not name.endswith(".csv") or name in self.applied_files:
+                continue
+            try:
+                mtime = os.path.getmtime(os.path.join(self.delta_dir, name))
+            except OSError:
+                continue
+            if self.failed_files.get(name) == mtime:
+                continue
+            if now - mtime < self.settle_seconds:
+                # possibly still being written, and later files must not overtake it
+                break
+            pending.append((name, mtime))
+        return pending
+
+    def poll(self):
+        """Apply the pending delta files, each one is published as ``current`` once its structures are updated."""
+        with self._lock:
+            for name, mtime in self.pending_files():
+                if self.apply_file(os.path.join(self.delta_dir, name)):
+                    self.applied_files.add(name)
+                    self.failed_files.pop(name, None)
+                else:
+                    self.failed_files[name] = mtime
+
+    def apply_file(self, path):
+        """Apply the delta at ``path``, returns False if it could not be read."""
+        try:
+            delta, mode = read_delta(path)
+        except (OSError, ValueError, KeyError) as e:
+            warnings.warn(f"could not apply delta {path}: {e}")
+            return False
+        version = self.current.applied(delta, mode)
+        version.update_derived()
+        # a single assignment, a rerun sees either the old or the new version
+        self.current = version
+        return True
+
+    def run(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.poll()
+            except Exception as e:  # the thread must survive a bad delta directory
+                warnings.warn(f"delta refresh failed: {e}")
+
+    def start(self):
+        """Poll DELTA_DIR every ``poll_seconds`` on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="delta-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def current_version(self):
+        return self.current
+
+
+@st.cache_resource(show_spinner=False)
+def load_store(path):
+    """Process wide store of the dataset at ``path``, refreshed in the background."""
+    return DataStore(path).start()
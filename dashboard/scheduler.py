@@ -0,0 +1,168 @@
+"""Runs the independent chart builds of a rerun in parallel.
+
+    tasks = TaskGraph("Home_Page", trace)
+    tasks.add("aggregates", compute_aggregates, df_filtered)
+    tasks.add("px: genres", genres_figure, after=["aggregates"])
+    ...
+    st.plotly_chart(tasks.result("px: genres"))
+
+Each task starts on the shared thread pool once its dependencies are done,
+their results are passed in first, followed by the task's own arguments. The
+page asks for the results in layout order and renders them on the script
+thread, tasks must not call ``st.*`` themselves. pandas and numpy release the
+GIL in most kernels, plotly figure building mostly does not, so the gain is
+largest where the data prep dominates.
+
+Under load the pool is shared fairly: all graphs of a session (page,
+fragments and superseded reruns whose tasks still run) share one
+SessionQueue, so the session runs at most SESSION_TASKS tasks at once. A new
+rerun of the same page and session cancels the tasks of the rerun it
+superseded that have not started yet. ``settle`` debounces
+slider drags before the expensive part of a rerun.
+
+Results found in ``prerendered`` (dashboard.prerender) are not built at all,
+their tasks complete right away.
+"""
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from dashboard.settings import CHART_WORKERS, SESSION_TASKS, SETTLE_SECONDS
+from dashboard.tracing import NULL_TRACER
+
+# (session id, scope) -> task graph of the latest rerun
+_latest = weakref.WeakValueDictionary()
+# (session id, executor) -> queue shared by the session's graphs, dropped with the last graph using it
+_sessions = weakref.WeakValueDictionary()
+_latest_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def load_executor(workers=CHART_WORKERS):
+    """Process wide pool for chart tasks, None runs them inline."""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="charts") if workers > 0 else None
+
+
+class SessionQueue:
+    """Tasks of one session on the shared pool, at most ``limit`` run at once, the rest wait in FIFO order."""
+
+    def __init__(self, executor, limit=SESSION_TASKS):
+        self.executor = executor
+        self.limit = max(1, limit)
+        self._queued = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, future, run):
+        with self._lock:
+            self._queued.append((future, run))
+        self._start_queued()
+
+    def discard(self, futures):
+        """Cancel the ``futures`` that have not started and drop them from the queue."""
+        futures = set(futures)
+        with self._lock:
+            self._queued = deque(item for item in self._queued if item[0] not in futures)
+        for future in futures:
+            future.cancel()
+
+    def _start_queued(self):
+        # the rest waits here instead of in the shared pool
+        with self._lock:
+            while self._queued and self._running < self.limit:
+                self._running += 1
+                self.executor.submit(self._run_queued, *self._queued.popleft())
+
+    def _run_queued(self, future, run):
+        try:
+            TaskGraph._run(future, run)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._start_queued()
+
+
+class TaskGraph:
+    """Chart tasks of one rerun of ``scope`` (a page or fragment), keyed by name."""
+
+    def __init__(self, scope, trace=NULL_TRACER, executor=None, limit=SESSION_TASKS, prerendered=None):
+        self.trace = trace
+        self.prerendered = prerendered or {}
+        self.executor = executor if executor is not None else load_executor()
+        self.futures = {}
+        self.cancelled = False
+
+        ctx = get_script_run_ctx()
+        previous = None
+        # outside a session (prewarm, tests) every graph gets a queue of its own
+        self.queue = SessionQueue(self.executor, limit) if self.executor is not None else None
+        if ctx is not None:
+            with _latest_lock:
+                previous = _latest.get((ctx.session_id, scope))
+                _latest[(ctx.session_id, scope)] = self
+                if self.executor is not None:
+                    self.queue = _sessions.setdefault((ctx.session_id, self.executor), self.queue)
+        if previous is not None:
+            previous.cancel()
+
+    def add(self, name, func, *args, after=()):
+        """Schedule ``func(*results of after, *args)`` as task ``name``, dependencies are added first."""
+        if name in self.prerendered:
+            self.futures[name] = future = Future()
+            future.set_result(self.prerendered[name])
+            return
+        dependencies = [self.futures[dependency] for dependency in after]
+
+        def run():
+            # dependencies were started before this task, so they are running or done by now
+            inputs = [dependency.result() for dependency in dependencies]
+            if self.cancelled:
+                raise CancelledError(name)
+            with self.trace.span(name):
+                return func(*inputs, *args)
+
+        future = Future()
+        self.futures[name] = future
+        if self.queue is None:
+            self._run(future, run)
+        else:
+            self.queue.submit(future, run)
+
+    @staticmethod
+    def _run(future, run):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(run())
+        except BaseException as e:
+            future.set_exception(e)
+
+    def cancel(self):
+        """Drop the tasks that have not started, running ones finish but their dependents do not start."""
+        self.cancelled = True
+        if self.queue is not None:
+            self.queue.discard(self.futures.values())
+
+    def result(self, name):
+        """Result of task ``name``, waits for it and re-raises its exception."""
+        return self.futures[name].result()
+
+
+def settle(key, value, seconds=SETTLE_SECONDS):
+    """Pause briefly when widget ``key`` changed to ``value``.
+
+    A drag sends a burst of values. If the next one arrives during the pause,
+    Streamlit stops this rerun at its next ``st.*`` call, before the filters
+    and charts run, and starts over with the latest value. Call it right after
+    the widget and before another widget.
+    """
+    state_key = f"_settle_{key}"
+    changed = state_key in st.session_state and st.session_state[state_key] != value
+    st.session_state[state_key] = value
+    if changed and seconds > 0:
+        time.sleep(seconds)
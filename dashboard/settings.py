@@ -0,0 +1,44 @@
+"""Deployment settings, overridable through environment variables."""
+import os
+
+# dataset CSV, point this at a synthetic dataset (dashboard.synthetic) for load tests
+DATA_PATH = os.environ.get("DASHBOARD_DATA_PATH", "google_clean_v3.csv")
+
+# max points sent to the browser per scatter plot before it switches to a sample
+POINT_BUDGET = int(os.environ.get("DASHBOARD_POINT_BUDGET", 20_000))
+POINT_BUDGET_3D = int(os.environ.get("DASHBOARD_POINT_BUDGET_3D", 5_000))
+
+# per-rerun timing spans with a sidebar panel, written to TRACE_FILE in Prometheus text format
+TRACE = os.environ.get("DASHBOARD_TRACE", "").lower() in ("1", "true", "yes")
+TRACE_FILE = os.environ.get("DASHBOARD_TRACE_FILE", "dashboard_metrics_{pid}.prom")
+
+# engine behind the page queries: "pandas" (in memory) or "duckdb" (multi-threaded scans of the snapshot)
+QUERY_BACKEND = os.environ.get("DASHBOARD_QUERY_BACKEND", "pandas").lower()
+
+# delta CSVs applied on top of the dataset while the app runs (dashboard.refresh)
+DELTA_DIR = os.environ.get("DASHBOARD_DELTA_DIR", "deltas")
+DELTA_POLL_SECONDS = float(os.environ.get("DASHBOARD_DELTA_POLL_SECONDS", 30))
+# deltas modified more recently are left for the next poll, they may still be written
+DELTA_SETTLE_SECONDS = float(os.environ.get("DASHBOARD_DELTA_SETTLE_SECONDS", 5))
+
+# snapshot shared by all server processes on a host (e.g. /dev/shm/google_play.arrow), empty to disable
+SHARED_PATH = os.environ.get("DASHBOARD_SHARED_PATH", "")
+
+# threads building the charts of a rerun in parallel (dashboard.scheduler), 0 builds them one after another
+CHART_WORKERS = int(os.environ.get("DASHBOARD_CHART_WORKERS", min(8, os.cpu_count() or 1)))
+
+# chart tasks one session may run at once on the shared pool, the rest waits in the session's queue
+SESSION_TASKS = int(os.environ.get("DASHBOARD_SESSION_TASKS", 4))
+
+# pause after a slider changed so a drag ends in one rerun instead of one per step, 0 to disable
+SETTLE_SECONDS = float(os.environ.get("DASHBOARD_SETTLE_SECONDS", 0.15))
+
+# chart outputs of the common filter states, built by python -m dashboard.prerender, a missing directory disables it
+PRERENDER_DIR = os.environ.get("DASHBOARD_PRERENDER_DIR", "prerendered")
+
+# headless query API (dashboard.api), local only by default, streamed results are sent in chunks of API_CHUNK_ROWS.
+# With API set, python -m dashboard.startup serves it from the dashboard process.
+API = os.environ.get("DASHBOARD_API", "").lower() in ("1", "true", "yes")
+API_HOST = os.environ.get("DASHBOARD_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("DASHBOARD_API_PORT", 8502))
+API_CHUNK_ROWS = int(os.environ.get("DASHBOARD_API_CHUNK_ROWS", 10_000))
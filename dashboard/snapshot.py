@@ -0,0 +1,111 @@
+"""Typed, memory-mappable Arrow snapshot of the dataset.
+
+The snapshot stores the parsed and derived columns so a process start only has
+to map the file instead of parsing the CSV. It records the hash of the CSV it
+was built from and is rebuilt whenever the CSV changes.
+
+Build it ahead of a deploy with ``python -m dashboard.snapshot``.
+
+Several server processes on one host can share one copy: publish the snapshot
+with ``--publish /dev/shm/google_play.arrow`` and start the workers with
+DASHBOARD_SHARED_PATH pointing at it. Workers map it read-only without looking
+at the CSV. Numeric, date and string columns and the codes of categorical
+columns without missing values are views into the same pages of the mapping;
+each worker copies only the categories themselves (the distinct values, about
+50KB for the Play Store CSV, most of it Current Ver). Publish again after the
+CSV changed.
+"""
+import argparse
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+HASH_KEY = b"source_sha256"
+VERSION_KEY = b"format_version"
+# bump whenever the schema or the derived columns change, old snapshots are rebuilt
+FORMAT_VERSION = b"2"
+
+STRING_TYPES = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+
+
+def snapshot_path(csv_path):
+    """Snapshot file that belongs to ``csv_path``."""
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+def file_hash(path):
+    """sha256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_snapshot(df, path, source_hash):
+    """Write ``df`` as an uncompressed Arrow IPC file tagged with ``source_hash``."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **table.schema.metadata, HASH_KEY: source_hash.encode(), VERSION_KEY: FORMAT_VERSION,
+    })
+
+    # write next to the target and swap it in, concurrent readers never see half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path, source_hash=None):
+    """Memory-map a snapshot, None if it is missing, outdated or was built from another CSV."""
+    if not os.path.exists(path):
+        return None
+
+    reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    metadata = reader.schema.metadata or {}
+    if metadata.get(VERSION_KEY) != FORMAT_VERSION:
+        return None
+    if source_hash is not None and metadata.get(HASH_KEY) != source_hash.encode():
+        return None
+
+    # split_blocks avoids consolidating the columns into one big copy, and strings stay
+    # Arrow backed instead of becoming Python objects. Categorical codes are views as well,
+    # their categories are copied (and the codes too if the column has missing values)
+    return reader.read_all().to_pandas(split_blocks=True, types_mapper=STRING_TYPES.get)
+
+
+def build_snapshot(csv_path, path=None):
+    """Parse ``csv_path`` and (re)write its snapshot to ``path`` (next to the CSV by default), returns the path."""
+    from dashboard.data import read_dataset, add_derived_columns
+
+    path = path or snapshot_path(csv_path)
+    write_snapshot(add_derived_columns(read_dataset(csv_path)), path, file_hash(csv_path))
+    return path
+
+
+def publish_snapshot(csv_path, path):
+    """Write the snapshot of ``csv_path`` to the shared location ``path``."""
+    return build_snapshot(csv_path, path)
+
+
+def main():
+    from dashboard.data import DATA_PATH, memory_report
+
+    parser = argparse.ArgumentParser(description="Build the Arrow snapshot of the dataset.")
+    parser.add_argument("csv", nargs="?", default=DATA_PATH, help="source CSV (default: %(default)s)")
+    parser.add_argument("--report", action="store_true", help="print the memory used per column")
+    parser.add_argument("--publish", metavar="PATH", help="write it to PATH for workers with DASHBOARD_SHARED_PATH")
+    args = parser.parse_args()
+
+    path = publish_snapshot(args.csv, args.publish) if args.publish else build_snapshot(args.csv)
+    print(f"snapshot written to {path}")
+
+    if args.report:
+        print(memory_report(read_snapshot(path), baseline=pd.read_csv(args.csv)).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Server start: lazy imports for the pages and a prewarm before the port opens.
+
+    python -m dashboard.startup [streamlit run options]
+
+runs every page once with its default widget values in this process, which
+loads the dataset, builds the indexes and cubes and fills the aggregate cache
+with the default filter state, prints what that cost and then starts the
+Streamlit server on Home_Page.py. The health check only answers once the
+prewarm is done, so a load balancer never routes users to a cold replica.
+With DASHBOARD_API set the headless query API (dashboard.api) is started in
+the same process, on the dataset and caches the prewarm filled.
+"""
+import importlib
+import os
+import resource
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Home_Page.py", "pages/Ratings_Price_Paradox.py", "pages/Top_Apps.py", "pages/Android_Version.py"]
+
+
+class LazyModule:
+    """Stands in for a module and imports it on the first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # chart tasks may touch it from several threads at once
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name):
+    """The module if it is already imported, a LazyModule otherwise."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def prewarm(pages=PAGES):
+    """Run every page once with its defaults, returns (step, seconds, error) rows."""
+    from streamlit.testing.v1 import AppTest
+
+    report = []
+    for module in ("plotly.express", "plotly.graph_objects", "st_aggrid"):
+        _, seconds = timed(importlib.import_module, module)
+        report.append((f"import {module}", seconds, None))
+
+    from dashboard.data import load_dataset
+
+    _, seconds = timed(load_dataset)
+    report.append(("load dataset", seconds, None))
+
+    for page in pages:
+        at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+        _, seconds = timed(at.run)
+        report.append((f"run {page}", seconds, "; ".join(e.message for e in at.exception) or None))
+    return report
+
+
+def print_report(report):
+    for step, seconds, error in report:
+        print(f"{step:<45} {seconds * 1000:8.0f} ms" + (f"  FAILED: {error}" if error else ""))
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+    print(f"{'total':<45} {sum(seconds for _, seconds, _ in report) * 1000:8.0f} ms  rss {peak_rss:.0f}MB")
+
+
+def main():
+    from streamlit.web import cli
+
+    from dashboard.settings import API, API_HOST, API_PORT
+
+    os.chdir(ROOT)
+    print_report(prewarm())
+    if API:
+        from dashboard import api
+
+        api.start(API_HOST, API_PORT)
+        print(f"dashboard API on http://{API_HOST}:{API_PORT}")
+    # same process, so the server starts with everything the prewarm cached
+    sys.argv = ["streamlit", "run", os.path.join(ROOT, PAGES[0]), *sys.argv[1:]]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
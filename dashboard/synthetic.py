@@ -0,0 +1,108 @@
+"""Synthetic datasets in the google_clean_v3.csv schema, for load tests at production scale.
+
+Rows are drawn by a smoothed bootstrap of the source CSV: every synthetic
+row starts from a random template row, which keeps the joint distribution
+of Category, Type, Content Rating, Genres, Android Ver and Price, and the
+numeric columns are then perturbed (Installs moves to a neighbouring
+bucket, Reviews/Size get log-normal noise, Rating gaussian noise, dates a
+few weeks of jitter) so the values do not just repeat the source.
+
+    python -m dashboard.synthetic --rows 1000000 --out google_1m.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dashboard.settings import DATA_PATH
+
+COLUMNS = ["App", "Category", "Rating", "Reviews", "Size", "Installs", "Type", "Price", "Content Rating", "Genres",
+           "Current Ver", "Android Ver", "Day_last_update", "month_last_update", "year_last_update", "Last_Updated"]
+
+FORMATS = ["csv", "parquet"]
+
+
+class SyntheticGenerator:
+    """Draws chunks of synthetic rows from the distributions of ``source``."""
+
+    def __init__(self, source, seed=0):
+        self.source = source[COLUMNS].reset_index(drop=True)
+        self.rng = np.random.default_rng(seed)
+        self.installs_buckets = np.sort(self.source["Installs"].unique())
+        self.last_date = pd.to_datetime(self.source["Last_Updated"]).max().to_datetime64().astype("datetime64[D]")
+
+    def chunk(self, n_rows, offset=0):
+        """``n_rows`` synthetic rows, App names are numbered from ``offset``."""
+        rng = self.rng
+        rows = self.source.iloc[rng.integers(0, len(self.source), n_rows)].reset_index(drop=True)
+
+        # Installs moves to a neighbouring bucket for a fifth of the rows
+        bucket = np.searchsorted(self.installs_buckets, rows["Installs"].to_numpy())
+        bucket += rng.choice([-1, 0, 1], size=n_rows, p=[0.1, 0.8, 0.1])
+        installs = self.installs_buckets[np.clip(bucket, 0, len(self.installs_buckets) - 1)]
+
+        reviews = np.rint(rows["Reviews"].to_numpy() * rng.lognormal(0, 0.3, n_rows)).astype("int64")
+        rating = np.round(np.clip(rows["Rating"].to_numpy() + rng.normal(0, 0.15, n_rows), 1, 5), 1)
+        size = np.round(rows["Size"].to_numpy() * rng.lognormal(0, 0.1, n_rows), 1)
+
+        dates = pd.to_datetime(rows["Last_Updated"]).to_numpy().astype("datetime64[D]")
+        dates = np.minimum(dates + rng.integers(-30, 31, n_rows), self.last_date)
+        dates = pd.DatetimeIndex(dates)
+
+        return rows.assign(**{
+            "App": rows["App"] + " #" + pd.Series(np.arange(offset, offset + n_rows)).astype(str),
+            "Rating": rating,
+            "Reviews": np.minimum(reviews, installs),
+            "Size": size,
+            "Installs": installs,
+            "Day_last_update": dates.day,
+            "month_last_update": dates.month,
+            "year_last_update": dates.year,
+            "Last_Updated": dates.strftime("%Y-%m-%d"),
+        })
+
+    def chunks(self, n_rows, chunk_size=1_000_000):
+        """Yield ``n_rows`` rows in chunks of at most ``chunk_size``."""
+        for offset in range(0, n_rows, chunk_size):
+            yield self.chunk(min(chunk_size, n_rows - offset), offset)
+
+
+def write_dataset(chunks, path, file_format="csv"):
+    """Stream ``chunks`` to ``path`` as CSV or Parquet, returns the number of rows written."""
+    n_rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if file_format == "csv":
+                chunk.to_csv(path, mode="w" if n_rows == 0 else "a", header=n_rows == 0, index=False)
+            else:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset in the google_clean_v3 schema.")
+    parser.add_argument("--rows", type=int, required=True, help="number of rows to generate")
+    parser.add_argument("--out", required=True, help="output file")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="output format (default: %(default)s)")
+    parser.add_argument("--source", default=DATA_PATH, help="CSV to learn from (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="rows per chunk (default: %(default)s)")
+    args = parser.parse_args()
+
+    generator = SyntheticGenerator(pd.read_csv(args.source), seed=args.seed)
+    n_rows = write_dataset(generator.chunks(args.rows, args.chunk_size), args.out, args.format)
+    print(f"{n_rows:,} rows written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Precomputed rankings for "Top N apps by metric in category" lookups."""
+import numpy as np
+
+from dashboard.data import load_dataset
+
+RANKED_METRICS = ["Reviews", "Installs", "Rating"]
+
+
+class TopKIndex:
+    """Row positions per (metric, category) sorted by the metric, descending, one row per App.
+
+    The category ``None`` holds the ranking over all categories. Apps listed
+    more than once keep their best row, like ``drop_duplicates`` after a sort.
+    """
+
+    def __init__(self, df, metrics=RANKED_METRICS, category_column="Category", key_column="App"):
+        self.df = df
+        self.metrics = list(metrics)
+        self.category_column = category_column
+        self.key_column = key_column
+        self.rankings = {}
+
+        apps = df[key_column].to_numpy()
+        codes = df[category_column].cat.codes.to_numpy()
+        categories = df[category_column].cat.categories
+
+        for metric in metrics:
+            # stable descending sort, ties keep their file order
+            order = np.argsort(-df[metric].to_numpy(), kind="stable")
+            self.rankings[(metric, None)] = self._first_per_app(order, apps)
+            for code, category in enumerate(categories):
+                self.rankings[(metric, category)] = self._first_per_app(order[codes[order] == code], apps)
+
+    @staticmethod
+    def _first_per_app(order, apps):
+        _, first = np.unique(apps[order], return_index=True)
+        return order[np.sort(first)]
+
+    def updated(self, df, change):
+        """Index over ``df`` after ``change``. Rankings of untouched categories are only renumbered,
+        the others merge the previous ranking with the added rows instead of sorting every row."""
+        index = TopKIndex.__new__(TopKIndex)
+        index.df = df
+        index.metrics = self.metrics
+        index.category_column = self.category_column
+        index.key_column = self.key_column
+        index.rankings = {}
+
+        apps = df[self.key_column].to_numpy()
+        added_ids = change.added_ids()
+        added_categories = change.added[self.category_column].to_numpy()
+        empty = np.empty(0, dtype=np.intp)
+        for metric in self.metrics:
+            values = df[metric].to_numpy()
+            for category in [None, *df[self.category_column].cat.categories]:
+                kept = change.remap(self.rankings.get((metric, category), empty))
+                if category is not None and category not in change.touched:
+                    index.rankings[(metric, category)] = kept
+                    continue
+                # the best row of every kept app is in the old ranking, rows are ids in file order
+                added = added_ids if category is None else added_ids[added_categories == category]
+                candidates = np.sort(np.concatenate([kept, added]))
+                order = candidates[np.argsort(-values[candidates], kind="stable")]
+                index.rankings[(metric, category)] = self._first_per_app(order, apps)
+        return index
+
+    def positions(self, metric, category=None, n=10):
+        """Row positions of the top ``n`` apps, empty for an unknown category."""
+        ranking = self.rankings.get((metric, category))
+        return ranking[:n] if ranking is not None else np.empty(0, dtype=np.intp)
+
+    def top(self, metric, category=None, n=10):
+        """Rows of the top ``n`` apps by ``metric``, best first."""
+        return self.df.iloc[self.positions(metric, category, n)]
+
+
+def load_top_k_index(data=None):
+    """Top-K index of a dataset version (the current one by default), built once per version."""
+    data = data or load_dataset()
+    return data.derived("top_k_index", TopKIndex, TopKIndex.updated)
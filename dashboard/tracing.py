@@ -0,0 +1,124 @@
+"""Per-rerun timing spans for the pages, off unless DASHBOARD_TRACE is set.
+
+    trace = tracing.begin("Home_Page")
+    with trace.span("filter"):
+        ...
+    with trace.span("render: histogram", payload=fig):
+        st.plotly_chart(fig)
+    trace.finish()
+
+Every span records wall time and, if a ``payload`` is given, its size.
+There is no memory per span: tracemalloc only sees the whole process, and
+spans run at the same time on the chart pool, so the benchmark's peak RSS is
+the memory figure to look at. ``finish`` shows the breakdown in a sidebar
+expander and rewrites a Prometheus text file with the totals of this
+process. When tracing is disabled ``begin`` returns a tracer whose spans do
+nothing.
+"""
+import contextlib
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from dashboard.settings import TRACE, TRACE_FILE
+
+# (page, span) -> [count, seconds, payload bytes], totals of this process
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def payload_size(payload):
+    """Size of a payload in bytes: the plotly JSON of a figure, the in-memory size (deep) of a frame."""
+    if isinstance(payload, pd.DataFrame):
+        return int(payload.memory_usage(index=True, deep=True).sum())
+    return len(payload.to_json())
+
+
+class Tracer:
+    """Collects the spans of one rerun."""
+
+    enabled = True
+
+    def __init__(self, page):
+        self.page = page
+        self.spans = []
+
+    @contextlib.contextmanager
+    def span(self, name, payload=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                "span": name,
+                "seconds": time.perf_counter() - start,
+                "payload_bytes": payload_size(payload) if payload is not None else 0,
+            })
+
+    def finish(self, label="⏱ Rerun-Profil"):
+        """Show this rerun's spans in the sidebar and update the metrics file."""
+        spans = pd.DataFrame(self.spans, columns=["span", "seconds", "payload_bytes"])
+        with st.sidebar.expander(label):
+            st.dataframe(
+                spans.assign(ms=spans["seconds"] * 1000,
+                             payload_kb=spans["payload_bytes"] / 1024)[["span", "ms", "payload_kb"]],
+                hide_index=True,
+            )
+            st.caption(f"Gesamt: {spans['seconds'].sum() * 1000:.0f} ms")
+
+        with _totals_lock:
+            for span in self.spans:
+                totals = _totals.setdefault((self.page, span["span"]), [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += span["seconds"]
+                totals[2] += span["payload_bytes"]
+            write_metrics(TRACE_FILE)
+
+
+class NullTracer:
+    """Stand-in when tracing is off, spans cost one attribute lookup."""
+
+    enabled = False
+    _null_span = contextlib.nullcontext()
+
+    def span(self, name, payload=None):
+        return self._null_span
+
+    def finish(self, label=None):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+def begin(page):
+    """Tracer for the current rerun of ``page``."""
+    return Tracer(page) if TRACE else NULL_TRACER
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def write_metrics(path):
+    """Write the process totals in Prometheus text format (call with the totals lock held)."""
+    metrics = [
+        ("dashboard_span_count_total", "Number of times the span ran.", 0),
+        ("dashboard_span_seconds_total", "Wall time spent in the span.", 1),
+        ("dashboard_span_payload_bytes_total", "Payload produced by the span (figure JSON, frame memory).", 2),
+    ]
+    lines = []
+    for name, help_text, column in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (page, span), totals in sorted(_totals.items()):
+            lines.append(f'{name}{{pid="{os.getpid()}",page="{_label(page)}",span="{_label(span)}"}} {totals[column]}')
+
+    # swap the file in so the scraper never reads half of it
+    path = path.format(pid=os.getpid())
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -1,77 +1,88 @@
-import pandas as pd
 import streamlit as st
-import plotly.express as px
-import time
+
+from dashboard import tracing
+from dashboard.cube import load_android_version_cube
+from dashboard.scheduler import settle
+from dashboard.startup import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title="Android Versions study", layout="wide")
+trace = tracing.begin("Android_Version")
 
 #  "logo"
 
 st.sidebar.image("assets/logo_asmodeus.jpg", use_container_width=True)
 
 
-# Load your data
-data = pd.read_csv('google_clean_v3.csv')
-
-# Group by Android Version and calculate average installs
-android_version_installs = data.groupby('Android Ver')['Installs'].mean().reset_index()
+# Installs sum/count per (year, Android version), precomputed once per process
+with trace.span("load_data_cube"):
+    # apps without update date or Android version have no place in the animation
+    version_cells = load_android_version_cube().cells.dropna(subset=['year_last_update', 'Android Ver'])
 
 # Streamlit app
 st.title('Interactive and Animated Visualization')
 
-# Animation speed slider
+# Animation speed slider (seconds per year)
 speed = st.slider("Animationsgeschwindigkeit", 0.05, 1.0, 0.2, 0.05)
 
 # Year selection slider
-years = sorted(data['year_last_update'].unique())
+years = sorted(version_cells['year_last_update'].unique())
 selected_year = st.slider("Select Year", min_value=min(years), max_value=max(years), value=min(years))
+settle("android_year", selected_year)
 
 # Checkbox for Android version selection
-android_versions = sorted(data['Android Ver'].unique())
+android_versions = sorted(version_cells['Android Ver'].unique())
 selected_android_versions = st.multiselect("Select Android Versions", android_versions, default=android_versions)
 
-# Filter data based on selected year and Android versions
-filtered_data = data[
-    (data['year_last_update'] == selected_year) & (data['Android Ver'].isin(selected_android_versions))]
-android_version_installs_filtered = filtered_data.groupby('Android Ver')['Installs'].mean().reset_index()
-
-# Plot line chart for average installs by Android version with interactivity
-fig_android_version_installs = px.line(android_version_installs_filtered, x='Android Ver', y='Installs',
-                                       title=f'Average Installs by Android Version in {selected_year}',
-                                       labels={'Android Ver': 'Android Version', 'Installs': 'Average Installs'},
-                                       template='plotly_dark')
-
-# Add hover tooltips
-fig_android_version_installs.update_traces(mode='markers+lines',
-                                           hovertemplate='Android Version: %{x}<br>Installs: %{y}')
-
-# Add zoom and pan functionality (enabled by default in Plotly)
-fig_android_version_installs.update_layout(
-    xaxis=dict(rangeslider=dict(visible=True)),
-    yaxis=dict(fixedrange=False)
-)
+# Average installs per year and selected Android version, straight from the aggregates
+with trace.span("filter"):
+    cells = version_cells[version_cells['Android Ver'].isin(selected_android_versions)]
+    android_version_installs = (
+        cells.assign(Installs=cells['Installs_sum'] / cells['count'])[['year_last_update', 'Android Ver', 'Installs']]
+        .sort_values(['year_last_update', 'Android Ver'])
+    )
+
+if android_version_installs.empty:
+    st.warning("Keine Daten für die ausgewählten Android-Versionen.")
+    st.stop()
+
+# One figure with a frame per year, play and year scrubbing run in the browser
+with trace.span("px: animation"):
+    fig_android_version_installs = px.line(android_version_installs, x='Android Ver', y='Installs',
+                                           animation_frame='year_last_update', markers=True,
+                                           category_orders={'Android Ver': selected_android_versions},
+                                           title='Average Installs by Android Version',
+                                           labels={'Android Ver': 'Android Version', 'Installs': 'Average Installs',
+                                                   'year_last_update': 'Year'},
+                                           template='plotly_dark')
+
+    # Start on the selected year (or the first year that has data)
+    frame_names = [frame.name for frame in fig_android_version_installs.frames]
+    start = frame_names.index(str(selected_year)) if str(selected_year) in frame_names else 0
+    fig_android_version_installs = go.Figure(data=fig_android_version_installs.frames[start].data,
+                                             layout=fig_android_version_installs.layout,
+                                             frames=fig_android_version_installs.frames)
+    fig_android_version_installs.layout.sliders[0].active = start
+
+    # Add hover tooltips (frames carry their own trace settings)
+    for line in [*fig_android_version_installs.data, *(t for f in fig_android_version_installs.frames for t in f.data)]:
+        line.hovertemplate = 'Android Version: %{x}<br>Installs: %{y}'
+
+    # Add zoom and pan functionality (enabled by default in Plotly)
+    fig_android_version_installs.update_layout(
+        xaxis=dict(rangeslider=dict(visible=True)),
+        yaxis=dict(fixedrange=False, range=[0, android_version_installs['Installs'].max() * 1.1])
+    )
+
+    # Animation speed of the built-in play button
+    play_button = fig_android_version_installs.layout.updatemenus[0].buttons[0]
+    play_button.label = "▶️ Play Animation"
+    play_button.args[1]['frame']['duration'] = speed * 1000
 
 # Display the Plotly figure in Streamlit
-chart = st.plotly_chart(fig_android_version_installs, use_container_width=True, key='initial_chart')
-
-# Animation control
-if st.button("▶️ Play Animation"):
-    for year in years:
-        filtered_data = data[(data['year_last_update'] == year) & (data['Android Ver'].isin(selected_android_versions))]
-        android_version_installs_filtered = filtered_data.groupby('Android Ver')['Installs'].mean().reset_index()
-
-        fig_android_version_installs = px.line(android_version_installs_filtered, x='Android Ver', y='Installs',
-                                               title=f'Average Installs by Android Version in {year}',
-                                               labels={'Android Ver': 'Android Version',
-                                                       'Installs': 'Average Installs'},
-                                               template='plotly_dark')
-
-        fig_android_version_installs.update_traces(mode='markers+lines',
-                                                   hovertemplate='Android Version: %{x}<br>Installs: %{y}')
-        fig_android_version_installs.update_layout(
-            xaxis=dict(rangeslider=dict(visible=True)),
-            yaxis=dict(fixedrange=False)
-        )
-
-        chart.plotly_chart(fig_android_version_installs, use_container_width=True, key=f'chart_{year}')
-        time.sleep(speed)
\ No newline at end of file
+with trace.span("render: animation", payload=fig_android_version_installs):
+    st.plotly_chart(fig_android_version_installs, use_container_width=True)
+
+trace.finish()
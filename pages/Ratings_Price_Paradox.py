@@ -1,10 +1,20 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
+
+from dashboard import prerender, tracing
+from dashboard.cube import load_data_cube
+from dashboard.data import MAX_INSTALLS, MAX_REVIEWS, PRICE_CATEGORIES, load_dataset, without_extremes
+from dashboard.downsample import downsample
+from dashboard.query import Query, load_query_backend
+from dashboard.scheduler import TaskGraph
+from dashboard.settings import POINT_BUDGET_3D
+from dashboard.startup import lazy_import
+
+px = lazy_import("plotly.express")
 
 # Streamlit config
 st.set_page_config(layout="wide", page_title="Preis vs. Bewertung Paradoxon")
+trace = tracing.begin("Ratings_Price_Paradox")
 
 
 #  "logo"
@@ -12,40 +22,130 @@ st.set_page_config(layout="wide", page_title="Preis vs. Bewertung Paradoxon")
 st.sidebar.image("assets/logo_asmodeus.jpg", use_container_width=True)
 
 
-# Load, cache, data prep
-@st.cache_data
-def load_data():
-    """Load data, delete NaN´s, convert datetime, price categories."""
-    df = pd.read_csv("google_clean_v3.csv")
+# Load data for plot (Price Category, Rating Group and log columns are precomputed)
+with trace.span("load_data"):
+    dataset = load_dataset()
+    plot_data = dataset.df
+    query_backend = load_query_backend(dataset)
+
+# Chart builders, they run on the task pool and only return what the layout shows
+
+
+def scatter_figure(plot_data, x_axis, dot_size_metric):
+    """Scatter figure and the number of points in it."""
+    # sampled above the point budget, extremes of every plotted column are kept
+    scatter_data = downsample(plot_data, stratify="Type", extremes=[x_axis, "Rating", dot_size_metric])
+
+    fig_scatter = px.scatter(
+        scatter_data,
+        x=x_axis,
+        y="Rating",
+        color="Type",
+        size=dot_size_metric,
+        title="Rezensionen vs. Bewertungen (Gratis vs. Bezahlte Apps)",
+        hover_data=['App', 'Category', 'Price'],
+        color_discrete_map={"Free": "#5ec962", "Paid": "#440154"},
+        opacity=0.7
+    )
+    fig_scatter.update_traces(
+        marker=dict(
+            line=dict(
+                color='white',  # Set the border color to white
+                width=2  # Set the border width
+            )
+        )
+    )
+    return fig_scatter, len(scatter_data)
+
 
-    # Delete na´s
-    df = df.dropna(subset=['Rating', 'Type', 'Reviews', 'Price', 'Installs'])
+def reviews_figure(reviews_per_category_type):
+    review_counts = reviews_per_category_type.reset_index()
 
-    # Convert to numeric
-    df['Reviews'] = df['Reviews'].astype(str).str.replace(',', '').astype(int)
-    df['Installs'] = df['Installs'].astype(int)
-    df['Price'] = df['Price'].astype(float)
+    # Apply log transformation (log10)
+    review_counts["Log Reviews"] = np.log10(review_counts["Reviews"] + 1)  # Avoid log(0)
 
-    # Price categories function
-    def categorize_price(price):
-        """Categorize prices in 5 groups."""
-        if price == 0:
-            return "Gratis"
-        elif price <= 2:
-            return "Sehr Günstig (≤2€)"
-        elif price <= 10:
-            return "Günstig (2€ - 10€)"
-        elif price <= 30:
-            return "Mittelpreisig (10€ - 30€)"
-        else:
-            return "Teuer (>30€)"
+    # Create the bar chart
+    fig_reviews = px.bar(
+        review_counts,
+        x="Category",
+        y="Log Reviews",
+        color="Type",
+        title="Log-Skalierte Rezensionen pro Kategorie (Gratis vs. Bezahlte Apps)",
+        labels={"Log Reviews": "Log₁₀(Gesamtanzahl der Rezensionen)", "Category": "Kategorie"},
+        color_discrete_map={"Free": "#5ec962", "Paid": "#440154"},
+        barmode="group"  # Groups Paid and Free side by side
+    )
 
-    df["Price Category"] = df["Price"].apply(categorize_price)
+    # Improve layout for readability
+    fig_reviews.update_layout(
+        xaxis_title="Kategorie",
+        yaxis_title="Log₁₀(Gesamtanzahl der Rezensionen)",
+        xaxis_tickangle=-45  # Rotate x-axis labels
+    )
+    return fig_reviews
 
-    return df
 
-# Load data for plot
-plot_data = load_data()
+def price_categories_figure(cube, cube_filters):
+    price_counts = cube.rollup(["Price Category"], cube_filters)["count"].sort_values(ascending=False).reset_index()
+    price_counts.columns = ["Preiskategorie", "Anzahl"]
+
+    fig_bar = px.bar(price_counts, x="Preiskategorie", y="Anzahl", title="Anzahl der Apps nach Preis-Kategorie",
+                     color="Preiskategorie", color_discrete_sequence=px.colors.sequential.Plasma)
+
+    fig_bar.update_layout(
+        yaxis_title="App Count"
+    )
+    return fig_bar
+
+
+def rating_groups_figure(cube, cube_filters):
+    # Rating count by group
+    rating_counts = cube.rollup(["Rating Group"], cube_filters)["count"].sort_values(ascending=False).reset_index()
+    rating_counts.columns = ["Bewertungsgruppe", "Anzahl"]
+
+    # Pie chart for ratings
+    return px.pie(
+        rating_counts,
+        names="Bewertungsgruppe",
+        values="Anzahl",
+        title="Bewertungsverteilung (Alle Kategorien)",
+        color_discrete_sequence=px.colors.sequential.Viridis
+    )
+
+
+def review_pivot(reviews_per_category_type):
+    #  aggregate reviews by cat and type
+    review_table = reviews_per_category_type.unstack(fill_value=0)
+
+    #  add total column (Paid Free sum)
+    review_table["Total"] = review_table.sum(axis=1)
+
+    # Convert to integer format for display
+    return review_table.astype(int).sort_values(by="Total", ascending=False)
+
+
+def scatter_3d_figure(plot_data, x_axis, y_axis, dot_size_metric):
+    """3D scatter figure and the number of points in it."""
+    # 3D points are expensive to render, so the budget is smaller
+    scatter_3d_data = downsample(plot_data, budget=POINT_BUDGET_3D, stratify="Type",
+                                 extremes=[x_axis, y_axis, "Rating", dot_size_metric])
+
+    fig_3d = px.scatter_3d(
+        scatter_3d_data,
+        x=x_axis,
+        y=y_axis,
+        z="Rating",
+        color="Type",
+        size=dot_size_metric,
+        title="3D Scatter-Plot: Rezensionen, Installationen & Bewertungen",
+        hover_data=['App'],
+        color_discrete_map={"Free": "#5ec962", "Paid": "#440154"}
+    )
+
+    # Bigger!
+    fig_3d.update_layout(height=1200)
+    return fig_3d, len(scatter_3d_data)
+
 
 # Title
 st.title("Preis vs. Bewertung Paradoxon")
@@ -69,21 +169,14 @@ st.sidebar.header("Filter")
 # Extreme vals filter
 apply_filters = st.sidebar.checkbox("Extremwerte entfernen (Installationen > 50 Mio., Bewertungen > 10 Mio.)", value=False)
 if apply_filters:
-    plot_data = plot_data[(plot_data["Installs"] <= 50_000_000) & (plot_data["Reviews"] <= 10_000_000)]
-
-# Activate log scaling
-log_scale = st.sidebar.checkbox("Log-Skalierung für Bewertungen & Installationen verwenden", value=False)
+    with trace.span("filter: extremes"):
+        plot_data = without_extremes(plot_data)
 
-# Create log transformed cols
-plot_data["Log Reviews"] = np.log10(plot_data["Reviews"] + 1)
-plot_data["Log Installs"] = np.log10(plot_data["Installs"] + 1)
-
-# Axis choice based on log scale selection
-x_axis = "Log Reviews" if log_scale else "Reviews"
-y_axis = "Log Installs" if log_scale else "Installs"
-
-# Dot size metric
-dot_size_metric = st.sidebar.selectbox("Metrik für Punktgröße wählen:", ["Reviews", "Rating", "Price", "Installs"])
+# Additive rollups come from the cube, the filters below are mirrored into cube_filters and query_filters
+with trace.span("load_data_cube"):
+    cube = load_data_cube(remove_extremes=apply_filters, data=dataset)
+cube_filters = {}
+query_filters = (("Installs", "<=", MAX_INSTALLS), ("Reviews", "<=", MAX_REVIEWS)) if apply_filters else ()
 
 # App category filter
 category_filter = st.sidebar.selectbox(
@@ -93,167 +186,132 @@ category_filter = st.sidebar.selectbox(
 
 # Apply the filter if a category is selected
 if category_filter != "Alle":
-    plot_data = plot_data[plot_data["Category"] == category_filter]
+    with trace.span("filter: category"):
+        plot_data = plot_data[plot_data["Category"] == category_filter]
+    cube_filters["Category"] = category_filter
+    query_filters += (("Category", "==", category_filter),)
 
 # Price range filter
 price_range = st.sidebar.selectbox(
     "Preiskategorie wählen:",
-    ["Alle", "Gratis", "Sehr Günstig (≤2€)", "Günstig (2€ - 10€)", "Mittelpreisig (10€ - 30€)", "Teuer (>30€)"]
+    ["Alle"] + PRICE_CATEGORIES
 )
 
 # Apply price filter if not ALLE
 if price_range != "Alle":
-    plot_data = plot_data[plot_data["Price Category"] == price_range]
-
-# Scatter-Plot: Bewertungen vs. Installationen
+    with trace.span("filter: price category"):
+        plot_data = plot_data[plot_data["Price Category"] == price_range]
+    cube_filters["Price Category"] = price_range
+    query_filters += (("Price Category", "==", price_range),)
+
+# The charts below only depend on the filters, they are built on the task pool (or come pre-rendered)
+# and rendered in order
+state = (apply_filters, category_filter, price_range)
+tasks = TaskGraph("Ratings_Price_Paradox", trace, prerendered=prerender.lookup("Ratings_Price_Paradox", state, dataset))
+# Review sums per category and type, used by the bar chart and the pivot table
+tasks.add("rollup: reviews per category and type",
+          lambda: cube.rollup(["Category", "Type"], cube_filters)["Reviews_sum"].rename("Reviews"))
+tasks.add("px: reviews per category", reviews_figure, after=["rollup: reviews per category and type"])
+tasks.add("px: price categories", price_categories_figure, cube, cube_filters)
+tasks.add("px: rating groups", rating_groups_figure, cube, cube_filters)
+tasks.add("pivot: reviews per category", review_pivot, after=["rollup: reviews per category and type"])
+
+# Scatter-Plot: Bewertungen vs. Installationen (drawn by point_charts below)
 with col_main:
     st.subheader("Scatter-Plot: Rezensionen vs. Bewertungen")
 
-    fig_scatter = px.scatter(
-        plot_data,
-        x=x_axis,
-        y="Rating",
-        color="Type",
-        size=dot_size_metric,
-        title="Rezensionen vs. Bewertungen (Gratis vs. Bezahlte Apps)",
-        hover_data=['App', 'Category', 'Price'],
-        color_discrete_map={"Free": "#5ec962", "Paid": "#440154"},
-        opacity=0.7
-    )
-    fig_scatter.update_traces(
-        marker=dict(
-            line=dict(
-                color='white',  # Set the border color to white
-                width=2  # Set the border width
-            )
-        )
-    )
-
-    st.plotly_chart(fig_scatter, use_container_width=True)
-
+# DataFrame: Show filtered data (drawn by point_charts below)
+with col_data:
+    st.subheader("Daten anzeigen")
 
 # Bar Chart: Log-Scaled Review Count per Category (Paid vs Free)
 st.subheader("Log-Skalierte Rezensionen pro Kategorie (Gratis vs. Bezahlte Apps)")
 
-# Aggregate review counts per category and type
-review_counts = plot_data.groupby(["Category", "Type"])["Reviews"].sum().reset_index()
-
-# Apply log transformation (log10)
-review_counts["Log Reviews"] = np.log10(review_counts["Reviews"] + 1)  # Avoid log(0)
-
-# Create the bar chart
-fig_reviews = px.bar(
-    review_counts,
-    x="Category",
-    y="Log Reviews",
-    color="Type",
-    title="Log-Skalierte Rezensionen pro Kategorie (Gratis vs. Bezahlte Apps)",
-    labels={"Log Reviews": "Log₁₀(Gesamtanzahl der Rezensionen)", "Category": "Kategorie"},
-    color_discrete_map={"Free": "#5ec962", "Paid": "#440154"},
-    barmode="group"  # Groups Paid and Free side by side
-)
-
-# Improve layout for readability
-fig_reviews.update_layout(
-    xaxis_title="Kategorie",
-    yaxis_title="Log₁₀(Gesamtanzahl der Rezensionen)",
-    xaxis_tickangle=-45  # Rotate x-axis labels
-)
-
 # Display the chart
-st.plotly_chart(fig_reviews, use_container_width=True)
-
-# DataFrame: Show filtered data
-with col_data:
-    st.subheader("Daten anzeigen")
-    plot_data_sorted = plot_data.sort_values(by=dot_size_metric, ascending=False)
-    st.dataframe(plot_data_sorted[["App", "Category", "Rating", "Reviews", "Installs", "Price", "Type"]].head(10))
+fig_reviews = tasks.result("px: reviews per category")
+with trace.span("render: reviews per category", payload=fig_reviews):
+    st.plotly_chart(fig_reviews, use_container_width=True)
 
 #   Bar Chart: Number of Apps per Price Category
 with col_bar:
     st.subheader("Bar Chart: Anzahl der Apps nach Preis-Kategorie")
 
-    price_counts = plot_data["Price Category"].value_counts().reset_index()
-    price_counts.columns = ["Preiskategorie", "Anzahl"]
-
-    fig_bar = px.bar(price_counts, x="Preiskategorie", y="Anzahl", title="Anzahl der Apps nach Preis-Kategorie",
-                     color="Preiskategorie", color_discrete_sequence=px.colors.sequential.Plasma)
-
-    fig_bar.update_layout(
-        yaxis_title="App Count"
-    )
-
-    st.plotly_chart(fig_bar, use_container_width=True)
+    fig_bar = tasks.result("px: price categories")
+    with trace.span("render: price categories", payload=fig_bar):
+        st.plotly_chart(fig_bar, use_container_width=True)
 
 # Pie Chart: Rating Distribution
 with col_pie:
     st.subheader("Bewertungsverteilung")
 
-    # Rating categories
-    def categorize_rating(rating):
-        "Categorize rating in 5 groups"
-        if rating < 2:
-            return "Sehr Niedrig (1.0 - 1.9)"
-        elif rating < 3:
-            return "Niedrig (2.0 - 2.9)"
-        elif rating < 4:
-            return "Mittel (3.0 - 3.9)"
-        elif rating < 4.5:
-            return "Hoch (4.0 - 4.4)"
-        else:
-            return "Sehr Hoch (4.5 - 5.0)"
-
-    plot_data["Rating Group"] = plot_data["Rating"].apply(categorize_rating)
-
-    # Rating count by group
-    rating_counts = plot_data["Rating Group"].value_counts().reset_index()
-    rating_counts.columns = ["Bewertungsgruppe", "Anzahl"]
-
-    # Pie chart for ratings
-    fig_pie = px.pie(
-        rating_counts,
-        names="Bewertungsgruppe",
-        values="Anzahl",
-        title="Bewertungsverteilung (Alle Kategorien)",
-        color_discrete_sequence=px.colors.sequential.Viridis
-    )
-
-    st.plotly_chart(fig_pie, use_container_width=True)
+    fig_pie = tasks.result("px: rating groups")
+    with trace.span("render: rating groups", payload=fig_pie):
+        st.plotly_chart(fig_pie, use_container_width=True)
 
 #   Pivot Table: Reviews per Category (Paid vs Free)
 st.subheader("Tabelle der Rezensionen pro Kategorie (Gratis vs. Bezahlte Apps)")
 
-#  aggregate reviews by cat and type
-review_table = plot_data.groupby(["Category", "Type"])["Reviews"].sum().unstack(fill_value=0)
-
-#  add total column (Paid Free sum)
-review_table["Total"] = review_table.sum(axis=1)
-
-# Convert to integer format for display
-review_table = review_table.astype(int).sort_values(by="Total", ascending=False)
-
 # Display as Streamlit table
-st.dataframe(review_table.style.format(thousands=","))  # Formats numbers with commas for readability
+review_table = tasks.result("pivot: reviews per category")
+with trace.span("render: pivot table", payload=review_table):
+    st.dataframe(review_table.style.format(thousands=","))  # Formats numbers with commas for readability
 
 
 # 3D Scatter-Plot
 st.subheader("3D Scatter-Plot: Rezensionen, Installationen & Bewertungen")
-
-fig_3d = px.scatter_3d(
-    plot_data,
-    x="Log Reviews" if log_scale else "Reviews",
-    y="Log Installs" if log_scale else "Installs",
-    z="Rating",
-    color="Type",
-    size=dot_size_metric,
-    title="3D Scatter-Plot: Rezensionen, Installationen & Bewertungen",
-    hover_data=['App'],
-    color_discrete_map={"Free": "#5ec962", "Paid": "#440154"}
-)
-
-# Bigger!
-fig_3d.update_layout(height=1200)
-
-st.plotly_chart(fig_3d, use_container_width=True)
-
-
+section_3d = st.container()
+
+
+# The scatter plots and the top rows are the only blocks that depend on the display options,
+# changing those reruns just this fragment, the filtered rows come in as arguments
+@st.fragment
+def point_charts(plot_data, query_filters, state):
+    fragment_trace = tracing.begin("Ratings_Price_Paradox/point_charts")
+
+    with st.sidebar:
+        # Activate log scaling
+        log_scale = st.checkbox("Log-Skalierung für Bewertungen & Installationen verwenden", value=False)
+
+        # Dot size metric
+        dot_size_metric = st.selectbox("Metrik für Punktgröße wählen:", ["Reviews", "Rating", "Price", "Installs"])
+
+    # Axis choice based on log scale selection
+    x_axis = "Log Reviews" if log_scale else "Reviews"
+    y_axis = "Log Installs" if log_scale else "Installs"
+
+    fragment_state = state + (log_scale, dot_size_metric)
+    tasks = TaskGraph("Ratings_Price_Paradox/point_charts", fragment_trace,
+                      prerendered=prerender.lookup("Ratings_Price_Paradox/point_charts", fragment_state, dataset))
+    tasks.add("px: scatter", scatter_figure, plot_data, x_axis, dot_size_metric)
+    tasks.add("query: top rows", query_backend.execute,
+              Query(query_filters, columns=("App", "Category", "Rating", "Reviews", "Installs", "Price", "Type"),
+                    order_by=((dot_size_metric, False),), limit=10))
+    tasks.add("px: 3d scatter", scatter_3d_figure, plot_data, x_axis, y_axis, dot_size_metric)
+
+    with col_main:
+        fig_scatter, n_points = tasks.result("px: scatter")
+        with fragment_trace.span("render: scatter", payload=fig_scatter):
+            st.plotly_chart(fig_scatter, use_container_width=True)
+        if n_points < len(plot_data):
+            st.caption(f"Stichprobe: {n_points:,} von {len(plot_data):,} Apps (inkl. Extremwerte)")
+
+    with col_data:
+        top_rows = tasks.result("query: top rows")
+        with fragment_trace.span("render: top rows", payload=top_rows):
+            st.dataframe(top_rows)
+
+    with section_3d:
+        fig_3d, n_points_3d = tasks.result("px: 3d scatter")
+        with fragment_trace.span("render: 3d scatter", payload=fig_3d):
+            st.plotly_chart(fig_3d, use_container_width=True)
+        if n_points_3d < len(plot_data):
+            st.caption(f"Stichprobe: {n_points_3d:,} von {len(plot_data):,} Apps (inkl. Extremwerte)")
+
+    prerender.record("Ratings_Price_Paradox/point_charts", fragment_state, tasks)
+    fragment_trace.finish(label="⏱ Fragment-Profil")
+
+
+point_charts(plot_data, query_filters, state)
+
+prerender.record("Ratings_Price_Paradox", state, tasks)
+trace.finish()
@@ -1,12 +1,16 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import time
-import numpy as np
-import os
+
+from dashboard import data, prerender, tracing
+from dashboard.animation import frame_duration, growth_steps, play_controls
+from dashboard.scheduler import TaskGraph
+from dashboard.startup import lazy_import
+from dashboard.topk import load_top_k_index
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title="Top apps study", layout="wide")
+trace = tracing.begin("Top_Apps")
 
 #  "logo"
 
@@ -14,149 +18,175 @@ st.sidebar.image("assets/logo_asmodeus.jpg", use_container_width=True)
 
 
 # Daten laden mit Fehlerhandling
-def load_data():
-    file_path = "google_clean_v3.csv"
-    if not os.path.exists(file_path):
-        st.error("⚠️ Die Datei google_clean_v3.csv wurde nicht gefunden.")
-        return pd.DataFrame()
+def load_dataset():
     try:
-        return pd.read_csv(file_path)
+        return data.load_dataset()
+    except FileNotFoundError:
+        st.error(f"⚠️ Die Datei {data.DATA_PATH} wurde nicht gefunden.")
     except Exception as e:
         st.error(f"⚠️ Fehler beim Laden der Datei: {e}")
-        return pd.DataFrame()
-
-
-# Funktion zur Auswahl der Top 10 Apps
-def get_top_10_apps(df, category):
-    df = df.copy()
-    df["Reviews"] = pd.to_numeric(df["Reviews"], errors="coerce").fillna(0).astype(int)
-
-    if category != "Alle Kategorien":
-        df = df[df["Category"] == category]
-
-    top_apps = df.sort_values(by="Reviews", ascending=False).drop_duplicates(subset=["App"]).head(10)
-    top_apps = top_apps.sort_values(by="Reviews", ascending=True)
+    return None
+
+
+# Funktion zur Auswahl der Top N Apps aus dem vorberechneten Index
+def get_top_apps(index, category, n=10):
+    top_apps = index.top("Reviews", None if category == "Alle Kategorien" else category, n)
+
+    # ascending, the charts grow towards the most reviewed app
+    return top_apps.iloc[::-1]
+
+
+# Alle Frames werden einmal berechnet und im Browser abgespielt
+def animation_figure(top_apps, chart_type, duration):
+    apps = top_apps["App"].tolist()
+    reviews = top_apps["Reviews"].to_numpy()
+    colors = [px.colors.qualitative.Set2[i % len(px.colors.qualitative.Set2)] for i in range(len(apps))]
+    y_max = max(1000000, reviews.max() * 1.2)
+
+    if chart_type == "3D Bubble Chart":
+        animated_reviews, factors = growth_steps(reviews)
+        sizes = animated_reviews / reviews.max() * 50
+        frames = [
+            go.Frame(
+                name=str(i),
+                data=[go.Scatter3d(x=apps, y=animated_reviews[i], z=animated_reviews[i],
+                                   marker=dict(size=sizes[i]))],
+                layout=dict(scene_camera=dict(eye=dict(x=1.5 - factor, y=1.5 - factor, z=0.5 + factor))),
+            )
+            for i, factor in enumerate(factors)
+        ]
+        fig = go.Figure(
+            data=[go.Scatter3d(
+                x=apps, y=animated_reviews[-1], z=animated_reviews[-1], mode="markers",
+                text=apps, opacity=0.8,
+                marker=dict(size=sizes[-1], sizemode="area", sizemin=5, sizeref=2 * sizes.max() / 50 ** 2,
+                            color=colors)
+            )],
+            frames=frames,
+        )
+        fig.update_layout(
+            title=f"📊 3D Bubble Chart der Top {len(apps)} Apps",
+            dragmode='pan',
+            scene_camera=dict(eye=dict(x=0.5, y=0.5, z=1.5)),
+            scene=dict(
+                xaxis=dict(range=[-1, len(top_apps) + 1]),
+                yaxis=dict(range=[0, y_max]),
+                zaxis=dict(range=[0, y_max])
+            ),
+            updatemenus=play_controls(duration, redraw=True)
+        )
+
+    elif chart_type == "Liniendiagramm":
+        frames = [
+            go.Frame(name=str(j), data=[go.Scatter(x=apps[:j], y=reviews[:j])])
+            for j in range(1, len(apps) + 1)
+        ]
+        fig = go.Figure(
+            data=[go.Scatter(
+                x=apps,
+                y=reviews,
+                mode='lines+markers',
+                line=dict(color='royalblue', width=3),
+                marker=dict(size=8, color='royalblue')
+            )],
+            frames=frames,
+        )
+        fig.update_layout(
+            dragmode='pan',
+            title="📊 Entwicklung der Bewertungen (Liniendiagramm)",
+            xaxis_title="App",
+            yaxis_title="Anzahl der Bewertungen",
+            xaxis=dict(categoryorder="array", categoryarray=apps),
+            yaxis=dict(range=[0, y_max]),
+            height=800, width=1000,
+            updatemenus=play_controls(duration)
+        )
+
+    elif chart_type == "Kreisdiagramm":
+        # the pie grows app by app, starting from the first animation step
+        first_step = (reviews / 100).astype(int)
+        frames = [
+            go.Frame(name=str(j), data=[go.Pie(labels=apps[:j], values=first_step[:j])])
+            for j in range(1, len(apps) + 1)
+        ]
+        fig = go.Figure(
+            data=[go.Pie(labels=apps, values=first_step, hole=0.3, sort=False, marker=dict(colors=colors))],
+            frames=frames,
+        )
+        fig.update_layout(
+            title="📊 Verteilung der Bewertungen (Kreisdiagramm)",
+            updatemenus=play_controls(duration, redraw=True)
+        )
 
-    return top_apps
-
-
-# Hauptanimationsfunktion
-def animate_chart(top_apps):
-    chart = st.empty()
+    else:
+        animated_reviews, _ = growth_steps(reviews)
+        labels = [[f"{x:,}" for x in row] for row in animated_reviews.tolist()]
+        frames = [
+            go.Frame(name=str(i), data=[go.Bar(x=apps, y=animated_reviews[i], text=labels[i])])
+            for i in range(len(animated_reviews))
+        ]
+        fig = go.Figure(
+            data=[go.Bar(x=apps, y=animated_reviews[-1], text=labels[-1], marker_color=colors)],
+            frames=frames,
+        )
+        fig.update_traces(textposition="outside", marker=dict(line=dict(width=1, color='black')))
+        fig.update_yaxes(range=[0, y_max], gridcolor='lightgray')
+        fig.update_layout(
+            title=f"📊 Top {len(apps)} Apps nach Anzahl der Bewertungen",
+            dragmode='pan', height=600, width=800,
+            updatemenus=play_controls(duration)
+        )
+
+    return fig
+
+
+# Hauptanimationsfunktion. Diagrammtyp und Geschwindigkeit betreffen nur dieses Fragment,
+# die Top-K Abfrage läuft dabei nicht erneut
+@st.fragment
+def animate_chart(top_apps, state):
+    fragment_trace = tracing.begin("Top_Apps/animate_chart")
     chart_type = st.radio("Diagrammtyp auswählen",
                           ["Balkendiagramm", "Kreisdiagramm", "Liniendiagramm", "3D Bubble Chart"], index=0)
     speed = st.slider("🎛 Animationsgeschwindigkeit", 0.01, 1.0, 1.0, 0.01)
 
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        start_animation = st.button("▶️ Play", key="start_button", help="Starte die Animation")
-
-    if start_animation:
-        y_max = max(1000000, top_apps["Reviews"].max() * 1.2)
-
-        if chart_type == "3D Bubble Chart":
-            for i in range(1, 101):
-                animated_factor = i / 100
-                top_apps["Animated_Reviews"] = (top_apps["Reviews"] * animated_factor).astype(int)
-                top_apps["Size"] = (top_apps["Animated_Reviews"] / top_apps["Reviews"].max()) * 50
-
-                fig = px.scatter_3d(
-                    top_apps, x="App", y="Animated_Reviews", z="Animated_Reviews",
-                    size="Size", color="App",
-                    title="📊 3D Bubble Chart der Top 10 Apps",
-                    opacity=0.8,
-                    size_max=50
-                )
-                fig.update_traces(marker=dict(sizemode='area', sizemin=5))
-                fig.update_layout(
-                    dragmode='pan',
-                    scene_camera=dict(
-                        eye=dict(x=1.5 - animated_factor, y=1.5 - animated_factor, z=0.5 + animated_factor)),
-                    scene=dict(
-                        xaxis=dict(range=[-1, len(top_apps) + 1]),
-                        yaxis=dict(range=[0, y_max]),
-                        zaxis=dict(range=[0, y_max])
-                    )
-                )
-                chart.plotly_chart(fig, use_container_width=True, key=f"chart_3d_{i}")
-                time.sleep(1 / (speed * 30))
-            return
-
-        if chart_type == "Liniendiagramm":
-            fig = go.Figure()
-            x_data = top_apps["App"]
-            y_data = top_apps["Reviews"]
-
-            for j in range(1, len(x_data) + 1):
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=x_data[:j],
-                    y=y_data[:j],
-                    mode='lines+markers',
-                    line=dict(color='royalblue', width=3),
-                    marker=dict(size=8, color='royalblue')
-                ))
-                fig.update_layout(
-                    dragmode='pan',
-                    title="📊 Entwicklung der Bewertungen (Liniendiagramm)",
-                    xaxis_title="App",
-                    yaxis_title="Anzahl der Bewertungen",
-                    yaxis=dict(range=[0, y_max]),
-                    height=800, width=1000
-                )
-                chart.plotly_chart(fig, use_container_width=True, key=f"chart_line_{j}")
-                time.sleep(1 / (speed * 30))
-            return
-
-        for i in range(1, 101):
-            animated_reviews = (top_apps["Reviews"] * i / 100).astype(int)
-            top_apps["Animated_Reviews"] = animated_reviews
-
-            if chart_type == "Balkendiagramm":
-                fig = px.bar(
-                    top_apps, x="App", y="Animated_Reviews",
-                    title="📊 Top 10 Apps nach Anzahl der Bewertungen",
-                    text=top_apps["Animated_Reviews"].apply(lambda x: f"{x:,}"),
-                    color="App",
-                    color_discrete_sequence=px.colors.qualitative.Set2
-                )
-                fig.update_traces(textposition="outside", marker=dict(line=dict(width=1, color='black')))
-                fig.update_yaxes(range=[0, y_max], gridcolor='lightgray')
-                fig.update_layout(
-                    dragmode='pan', height=600, width=800)
-
-            elif chart_type == "Kreisdiagramm":
-                fig = go.Figure()
-                for j in range(len(top_apps)):
-                    temp_df = top_apps.iloc[:j + 1]
-                    fig = px.pie(
-                        temp_df, names="App", values="Animated_Reviews",
-                        title="📊 Verteilung der Bewertungen (Kreisdiagramm)",
-                        color_discrete_sequence=px.colors.qualitative.Set2,
-                        hole=0.3
-                    )
-                    chart.plotly_chart(fig, use_container_width=True, key=f"chart_pie_{i}_{j}")
-                    time.sleep(1 / (speed * 30))
-                break
-
-            chart.plotly_chart(fig, use_container_width=True, key=f"chart_{i}")
-            time.sleep(1 / (speed * 30))
+    # the figure of the common states comes pre-rendered (python -m dashboard.prerender)
+    fragment_state = state + (chart_type, speed)
+    tasks = TaskGraph("Top_Apps/animate_chart", fragment_trace,
+                      prerendered=prerender.lookup("Top_Apps/animate_chart", fragment_state, dataset))
+    tasks.add("go: animation", animation_figure, top_apps, chart_type, frame_duration(speed))
+    fig = tasks.result("go: animation")
+
+    with fragment_trace.span("render: animation", payload=fig):
+        st.plotly_chart(fig, use_container_width=True)
+    prerender.record("Top_Apps/animate_chart", fragment_state, tasks)
+    fragment_trace.finish(label="⏱ Fragment-Profil")
 
 
 # Streamlit UI
-df = load_data()
+with trace.span("load_data"):
+    dataset = load_dataset()
+if dataset is None or dataset.df.empty:
+    st.stop()
+df = dataset.df
+
 st.markdown("#### 📊 Google Play Store Analyse", unsafe_allow_html=True)
 st.markdown("###### Entdecke deine App")
 
 categories = ["Alle Kategorien"] + sorted(df["Category"].dropna().unique().tolist())
 selected_category = st.selectbox("📂 Wähle eine Kategorie", categories, key="category_select")
 
-option = st.selectbox("📈 Wähle eine Analyse", ["Top 10 Apps nach Anzahl der Bewertungen"])
+option = st.selectbox("📈 Wähle eine Analyse", ["Top Apps nach Anzahl der Bewertungen"])
+top_n = st.selectbox("🔢 Anzahl der Apps", [10, 50, 100])
 
-if option == "Top 10 Apps nach Anzahl der Bewertungen":
-    top_apps = get_top_10_apps(df, selected_category)
+if option == "Top Apps nach Anzahl der Bewertungen":
+    with trace.span("top_k"):
+        top_apps = get_top_apps(load_top_k_index(dataset), selected_category, top_n)
 
     if not top_apps.empty:
-        animate_chart(top_apps)
+        # includes the nested render span, the rest is building the frames
+        with trace.span("animate_chart"):
+            animate_chart(top_apps, (selected_category, top_n))
     else:
         st.warning("⚠️ Keine Apps in dieser Kategorie gefunden.")
+
+trace.finish()
@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def repo_root(monkeypatch):
+    """Run from the repository root, the pages read the dataset and the logo relative to it."""
+    monkeypatch.chdir(ROOT)
+    return ROOT
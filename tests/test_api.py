@@ -0,0 +1,38 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dashboard import api
+
+
+@pytest.fixture
+def server(repo_root):
+    server = api.start("127.0.0.1", 0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, data=None):
+    try:
+        with urllib.request.urlopen(url, data=data) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_top_apps(server):
+    status, rows = get(f"{server}/top?metric=Installs&category=GAME&n=3&columns=App,Installs")
+    assert status == 200
+    assert [row["App"] for row in rows] == ["Subway Surfers", "Candy Crush Saga", "Temple Run 2"]
+
+
+def test_load_failure_is_a_json_error(server, monkeypatch):
+    def broken():
+        raise OSError("snapshot unreadable")
+
+    monkeypatch.setattr(api, "load_dataset", broken)
+    assert get(f"{server}/categories") == (500, {"error": "snapshot unreadable"})
+    assert get(f"{server}/batch", data=b'{"queries": []}') == (500, {"error": "snapshot unreadable"})
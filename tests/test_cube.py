@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from dashboard.cube import DataCube, load_data_cube
+from dashboard.data import add_derived_columns, read_dataset, with_year
+from dashboard.refresh import DataVersion
+
+
+def with_missing_values(df, rows):
+    """``df`` without Category, Type and Last_Updated in ``rows``."""
+    columns = {column: df[column].copy() for column in ("Category", "Type", "Last_Updated")}
+    for values in columns.values():
+        values.iloc[rows] = None
+    return df.assign(**columns)
+
+
+def test_cube_counts_every_row(repo_root):
+    df = with_missing_values(add_derived_columns(read_dataset()), [0, 1, 2, 3])
+    cube = DataCube(with_year(df))
+
+    assert cube.cells["count"].sum() == len(df)
+    assert cube.rollup(["Category"])["count"].sum() == len(df)
+    assert cube.rollup(["Type"], {"Category": np.nan})["count"].sum() == 4
+
+
+def test_updated_cube_with_missing_values_equals_rebuild(repo_root):
+    df = add_derived_columns(read_dataset())
+    data = DataVersion(with_missing_values(df, [0, 1]))
+    load_data_cube(data=data)
+
+    # the first upserted app loses its Category, Type and update date
+    delta = with_missing_values(df.iloc[[5, 6]], [0])
+    data = data.applied(delta, "upsert")
+    cube = load_data_cube(data=data)
+
+    rebuilt = DataCube(with_year(data.df))
+    key = cube.dimensions
+    pd.testing.assert_frame_equal(
+        cube.cells.sort_values(key, ignore_index=True), rebuilt.cells.sort_values(key, ignore_index=True),
+        check_categorical=False)
+    assert cube.cells["count"].sum() == len(data.df)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from dashboard.data import add_derived_columns, read_dataset
+from dashboard.genres import GenreIndex, load_genre_index
+from dashboard.refresh import DataVersion
+
+
+def without_genres(df, rows):
+    genres = df["Genres"].copy()
+    genres.iloc[rows] = np.nan
+    return df.assign(Genres=genres)
+
+
+def test_apps_without_genres_count_for_no_genre(repo_root):
+    df = add_derived_columns(read_dataset())
+    data = DataVersion(without_genres(df, [0, 1, 2]))
+
+    stats = load_genre_index(data).aggregate(data.df)
+    assert stats["count"].sum() == GenreIndex(df).aggregate(df.iloc[3:])["count"].sum()
+
+    # a delta that adds apps without Genres, the index is updated from the previous version
+    delta = without_genres(df.iloc[10:15].assign(App=lambda d: d["App"] + " (neu)"), [0, 1])
+    data = data.applied(delta, "append")
+    index = load_genre_index(data)
+    stats = index.aggregate(data.df)
+
+    rebuilt = GenreIndex(data.df)
+    pd.testing.assert_frame_equal(stats, rebuilt.aggregate(data.df))
+    for genre in rebuilt.genres:
+        np.testing.assert_array_equal(index.rows([genre]), rebuilt.rows([genre]))
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from dashboard.data import RATING_GROUPS
+from dashboard.grid import grid_options, page_rows
+
+
+def test_ordered_categories_sort_by_category_order():
+    df = pd.DataFrame({"Rating Group": pd.Categorical(
+        [RATING_GROUPS[4], RATING_GROUPS[0], RATING_GROUPS[2]], categories=RATING_GROUPS, ordered=True)})
+    rows = page_rows(df, 1, 10, "Rating Group")
+    assert rows["Rating Group"].tolist() == [RATING_GROUPS[0], RATING_GROUPS[2], RATING_GROUPS[4]]
+
+
+def test_missing_values_come_last_in_both_directions():
+    df = pd.DataFrame({"Rating": [4.0, np.nan, 2.0, 5.0]})
+    assert page_rows(df, 1, 10, "Rating", ascending=True)["Rating"].tolist()[:3] == [2.0, 4.0, 5.0]
+    descending = page_rows(df, 1, 10, "Rating", ascending=False)["Rating"].tolist()
+    assert descending[:3] == [5.0, 4.0, 2.0] and np.isnan(descending[3])
+
+
+def test_grid_leaves_sorting_and_filtering_to_the_server():
+    options = grid_options(["App", "Rating"])
+    assert not options["defaultColDef"]["sortable"] and not options["defaultColDef"]["filter"]
+    # no column type, those bring their own filter back
+    assert options["columnDefs"] == [{"field": "App", "headerName": "App"}, {"field": "Rating", "headerName": "Rating"}]
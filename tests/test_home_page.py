@@ -0,0 +1,17 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+
+def test_genre_combination_without_apps_shows_a_warning(repo_root):
+    at = AppTest.from_file(os.path.join(repo_root, "Home_Page.py"), default_timeout=600)
+    at.run()
+
+    # no app in the shipped CSV is both Action and Casual
+    at.sidebar.multiselect[0].set_value(["Action", "Casual"])
+    at.sidebar.radio[0].set_value("Alle")
+    at.run()
+
+    assert not at.exception
+    assert [warning.value for warning in at.warning] == ["Keine Apps für die ausgewählten Filter gefunden."]
+    assert not at.get("plotly_chart")
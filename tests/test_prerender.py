@@ -0,0 +1,34 @@
+import json
+import os
+import pickle
+from types import SimpleNamespace
+
+from dashboard import prerender
+
+
+def write_store(directory, scope, state, outputs):
+    key = prerender.state_key(scope, state)
+    with open(os.path.join(directory, f"{key}.pkl"), "wb") as f:
+        pickle.dump(outputs, f)
+    with open(os.path.join(directory, prerender.MANIFEST), "w") as f:
+        json.dump({"format": prerender.FORMAT_VERSION, "build": prerender.build_signature(), "keys": [key]}, f)
+
+
+def test_changed_code_invalidates_the_store(repo_root, tmp_path, monkeypatch):
+    data = SimpleNamespace(version=0)
+    write_store(tmp_path, "Home_Page", ("Alle", "Alle"), {"aggregates": 1})
+    prerender.load_prerender_store.clear()
+    assert prerender.lookup("Home_Page", ("Alle", "Alle"), data, directory=str(tmp_path)) == {"aggregates": 1}
+
+    # a deploy with new page code
+    monkeypatch.setattr(prerender, "code_hash", lambda: "changed")
+    prerender.load_prerender_store.clear()
+    assert prerender.lookup("Home_Page", ("Alle", "Alle"), data, directory=str(tmp_path)) is None
+
+
+def test_code_hash_covers_the_pages(repo_root, tmp_path):
+    (tmp_path / "pages").mkdir()
+    (tmp_path / "pages" / "Top_Apps.py").write_text("title = 'a'\n")
+    before = prerender.code_hash.__wrapped__(str(tmp_path))
+    (tmp_path / "pages" / "Top_Apps.py").write_text("title = 'b'\n")
+    assert prerender.code_hash.__wrapped__(str(tmp_path)) != before
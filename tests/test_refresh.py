@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.cube import DIMENSIONS, DataCube, load_data_cube
+from dashboard.data import with_year
+from dashboard.genres import GenreIndex, load_genre_index
+from dashboard.index import FilterIndex, load_filter_index
+from dashboard.refresh import DataStore
+from dashboard.settings import DATA_PATH
+from dashboard.topk import TopKIndex, load_top_k_index
+
+
+def write_upsert_delta(path):
+    """Changed ratings, reviews and categories of a few apps plus one new app."""
+    rows = pd.read_csv(DATA_PATH).iloc[[0, 1, 500, 3000]].copy()
+    rows["Rating"] = [2.5, 5.0, 1.0, 4.4]
+    rows["Reviews"] = [10, 99_000_000, 3, 1234]
+    rows.loc[rows.index[2], "Category"] = "GAME"
+    rows.loc[rows.index[3], "App"] = "Neue App"
+    rows.to_csv(path, index=False)
+
+
+def build_structures(data):
+    load_filter_index(data)
+    load_top_k_index(data)
+    load_genre_index(data)
+    load_data_cube(data=data)
+
+
+def test_incremental_structures_equal_rebuilds(repo_root, tmp_path):
+    store = DataStore(DATA_PATH, delta_dir=str(tmp_path), settle_seconds=0)
+    build_structures(store.current)
+
+    write_upsert_delta(tmp_path / "2026-10-18.csv")
+    store.poll()
+    data = store.current
+    assert data.version == 1 and data.change.touched
+
+    # updated before the version was published, nothing is rebuilt on first read
+    assert {"filter_index", "top_k_index", "genre_index", ("data_cube", False)} <= set(data._derived)
+    df = data.df
+
+    index, rebuilt = load_filter_index(data), FilterIndex(df)
+    for col, bitmaps in rebuilt.bitmaps.items():
+        for value, bitmap in bitmaps.items():
+            np.testing.assert_array_equal(index.bitmap(col, value), bitmap)
+    for col, (_, values) in rebuilt.sorted.items():
+        np.testing.assert_array_equal(index.sorted[col][1], values)
+
+    top_k, rebuilt = load_top_k_index(data), TopKIndex(df)
+    assert top_k.rankings.keys() == rebuilt.rankings.keys()
+    for key, ranking in rebuilt.rankings.items():
+        np.testing.assert_array_equal(top_k.rankings[key], ranking)
+
+    genres, rebuilt = load_genre_index(data), GenreIndex(df)
+    for genre in rebuilt.genres:
+        np.testing.assert_array_equal(genres.rows([genre]), rebuilt.rows([genre]))
+
+    cells, rebuilt = load_data_cube(data=data).cells, DataCube(with_year(df)).cells
+    pd.testing.assert_frame_equal(cells.sort_values(DIMENSIONS, ignore_index=True),
+                                  rebuilt.sort_values(DIMENSIONS, ignore_index=True), check_categorical=False)
+
+
+def test_only_complete_readable_deltas_are_applied(repo_root, tmp_path):
+    store = DataStore(DATA_PATH, delta_dir=str(tmp_path), settle_seconds=0)
+    (tmp_path / "2026-10-17.csv").write_text("not,a\ndelta\n")
+    write_upsert_delta(tmp_path / ".2026-10-18.csv")
+    write_upsert_delta(tmp_path / "2026-10-18.csv.tmp")
+    with pytest.warns(UserWarning, match="2026-10-17.csv"):
+        store.poll()
+    assert store.current.version == 0 and not store.applied_files
+
+    # not retried while unchanged, but once it is replaced
+    store.poll()
+    write_upsert_delta(tmp_path / "2026-10-17.csv")
+    os.utime(tmp_path / "2026-10-17.csv", (0, 0))
+    store.poll()
+    assert store.current.version == 1 and store.applied_files == {"2026-10-17.csv"}
+
+
+def test_recently_modified_deltas_wait(repo_root, tmp_path):
+    store = DataStore(DATA_PATH, delta_dir=str(tmp_path), settle_seconds=60)
+    write_upsert_delta(tmp_path / "2026-10-18.csv")
+    store.poll()
+    assert store.current.version == 0
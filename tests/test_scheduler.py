@@ -0,0 +1,50 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from dashboard import scheduler
+from dashboard.scheduler import TaskGraph
+
+
+def test_graphs_of_a_session_share_the_task_limit(monkeypatch):
+    monkeypatch.setattr(scheduler, "get_script_run_ctx", lambda: SimpleNamespace(session_id="session"))
+    executor = ThreadPoolExecutor(max_workers=8)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def job(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return i
+
+    # a page and a fragment of the same rerun
+    page = TaskGraph("page", executor=executor, limit=2)
+    fragment = TaskGraph("page/fragment", executor=executor, limit=2)
+    for i in range(4):
+        page.add(f"page {i}", job, i)
+        fragment.add(f"fragment {i}", job, i)
+
+    assert [page.result(f"page {i}") for i in range(4)] == [0, 1, 2, 3]
+    assert [fragment.result(f"fragment {i}") for i in range(4)] == [0, 1, 2, 3]
+    assert page.queue is fragment.queue
+    assert peak[0] == 2
+
+
+def test_new_rerun_cancels_queued_tasks(monkeypatch):
+    monkeypatch.setattr(scheduler, "get_script_run_ctx", lambda: SimpleNamespace(session_id="other session"))
+    executor = ThreadPoolExecutor(max_workers=4)
+    release = threading.Event()
+
+    old = TaskGraph("page", executor=executor, limit=1)
+    old.add("blocking", release.wait)
+    old.add("queued", lambda: "never")
+    new = TaskGraph("page", executor=executor, limit=1)
+    new.add("fresh", lambda: "done")
+    release.set()
+
+    assert old.futures["queued"].cancelled()
+    assert new.result("fresh") == "done"